@@ -0,0 +1,157 @@
+"""
+JSON API только для чтения: лента новостей, новость и её комментарии.
+
+Строки читаются через values() и сериализуются без создания объектов
+моделей. Параметр fields задаёт список полей через запятую: читаются
+только нужные столбцы, а число комментариев считается, только если
+оно запрошено. Страницы отдаются по курсору из параметра after,
+поэтому каждая страница стоит одного запроса независимо от глубины.
+"""
+from django.conf import settings
+from django.db.models import F
+from django.http import Http404, JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import generic
+from django.views.decorators.gzip import gzip_page
+
+from .feed import comment_count
+from .models import Comment, News
+from .pagination import rows_page
+
+# Поле ответа: имя поля модели или выражение.
+NEWS_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'text': 'text',
+    'excerpt': 'excerpt',
+    'date': 'date',
+    'updated_at': 'updated_at',
+    'comment_count': comment_count,
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'news': 'news',
+    'author': 'author',
+    'author_username': lambda: F('author__username'),
+    'text': 'text',
+    'created': 'created',
+}
+
+
+def json_response(data, status=200):
+    """JSON в UTF-8: кириллица не раздувается в escape-последовательности."""
+    return JsonResponse(
+        data, status=status, json_dumps_params={'ensure_ascii': False}
+    )
+
+
+class ApiError(Exception):
+    """Ошибка в параметрах запроса: ответ 400 с текстом ошибки."""
+
+
+def select(queryset, available, requested, required=()):
+    """
+    values() с запрошенными полями и полями ключа страницы.
+
+    Возвращает запрос и функцию, которая убирает из строки
+    незапрошенные поля ключа.
+    """
+    names = [*requested, *(name for name in required if name not in requested)]
+    fields = [name for name in names if isinstance(available[name], str)]
+    expressions = {
+        name: available[name]() for name in names
+        if not isinstance(available[name], str)
+    }
+    extra = [name for name in required if name not in requested]
+
+    def clean(row):
+        for name in extra:
+            del row[name]
+        return row
+
+    return queryset.values(*fields, **expressions), clean
+
+
+@method_decorator(gzip_page, name='dispatch')
+class ApiView(generic.View):
+    """Общая часть представлений API: поля ответа и ошибки запроса."""
+    fields = None
+    default_fields = None
+
+    def get_fields(self):
+        raw = self.request.GET.get('fields')
+        if not raw:
+            return list(self.default_fields)
+        requested = list(dict.fromkeys(
+            name.strip() for name in raw.split(',') if name.strip()
+        ))
+        unknown = [name for name in requested if name not in self.fields]
+        if unknown:
+            raise ApiError(f'Неизвестные поля: {", ".join(unknown)}.')
+        return requested
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as error:
+            return json_response({'error': str(error)}, status=400)
+
+    def page(self, queryset, field, size, descending=False):
+        queryset, clean = select(
+            queryset, self.fields, self.get_fields(), required=('id', field)
+        )
+        try:
+            rows, next_cursor = rows_page(
+                queryset, field, size, self.request.GET.get('after'),
+                descending
+            )
+        except ValueError:
+            raise ApiError('Некорректный курсор.')
+        return [clean(row) for row in rows], next_cursor
+
+
+class NewsListApi(ApiView):
+    """Новости от новых к старым."""
+    fields = NEWS_FIELDS
+    default_fields = ('id', 'title', 'excerpt', 'date', 'comment_count')
+
+    def get(self, request, *args, **kwargs):
+        rows, next_cursor = self.page(
+            News.objects.all(), 'date', settings.NEWS_API_PAGE_SIZE,
+            descending=True
+        )
+        return json_response({'results': rows, 'next': next_cursor})
+
+
+class NewsDetailApi(ApiView):
+    fields = NEWS_FIELDS
+    default_fields = (
+        'id', 'title', 'text', 'date', 'updated_at', 'comment_count'
+    )
+
+    def get(self, request, *args, **kwargs):
+        queryset, _ = select(
+            News.objects.all(), self.fields, self.get_fields()
+        )
+        row = queryset.filter(pk=kwargs['pk']).first()
+        if row is None:
+            raise Http404('Новость не найдена.')
+        return json_response(row)
+
+
+class CommentListApi(ApiView):
+    """Комментарии к новости от старых к новым."""
+    fields = COMMENT_FIELDS
+    default_fields = ('id', 'author', 'author_username', 'text', 'created')
+
+    def get(self, request, *args, **kwargs):
+        rows, next_cursor = self.page(
+            Comment.objects.published().filter(news_id=kwargs['pk']),
+            'created',
+            settings.COMMENTS_COUNT_ON_PAGE
+        )
+        # Существование новости проверяется, только если комментариев
+        # нет: иначе страница стоит одного запроса.
+        if not rows and not News.objects.filter(pk=kwargs['pk']).exists():
+            raise Http404('Новость не найдена.')
+        return json_response({'results': rows, 'next': next_cursor})
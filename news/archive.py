@@ -0,0 +1,73 @@
+"""
+Архив новостей по датам.
+
+Новости месяца или дня читаются диапазоном по индексу на News.date
+с курсором, как комментарии: дальняя страница архива стоит столько же,
+сколько последняя. Число новостей за каждый месяц хранится в таблице
+MonthlyNewsCount и пересчитывается для затронутых месяцев при
+сохранении и удалении новостей.
+"""
+from datetime import date, datetime
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from .models import MonthlyNewsCount, News
+
+
+def as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def month_bounds(year, month):
+    """Первый день месяца и первый день следующего."""
+    start = date(year, month, 1)
+    if month == 12:
+        return start, date(year + 1, 1, 1)
+    return start, date(year, month + 1, 1)
+
+
+def refresh_month(year, month, using=DEFAULT_DB_ALIAS):
+    """
+    Пересчитывает один месяц по индексу на дате.
+
+    Новости считаются в той же базе, куда записываются: в реплике
+    только что сохранённой новости может ещё не быть.
+    """
+    start, end = month_bounds(year, month)
+    count = News.objects.using(using).filter(
+        date__gte=start, date__lt=end
+    ).count()
+    counts = MonthlyNewsCount.objects.using(using)
+    if count:
+        counts.update_or_create(
+            year=year, month=month, defaults={'count': count}
+        )
+    else:
+        counts.filter(year=year, month=month).delete()
+
+
+def news_dates_changed(*dates, using=DEFAULT_DB_ALIAS):
+    """Пересчитывает месяцы, в которые попадают переданные даты."""
+    months = {
+        (value.year, value.month) for value in map(as_date, dates) if value
+    }
+    for year, month in sorted(months):
+        refresh_month(year, month, using)
+
+
+def rebuild_counts():
+    """
+    Пересчитывает всю таблицу одним проходом по новостям.
+
+    Нужен после bulk_create, который не отправляет сигналы.
+    """
+    counts = News.objects.order_by().annotate(
+        year=ExtractYear('date'), month=ExtractMonth('date')
+    ).values('year', 'month').annotate(count=Count('pk'))
+    with transaction.atomic():
+        MonthlyNewsCount.objects.all().delete()
+        MonthlyNewsCount.objects.bulk_create(
+            MonthlyNewsCount(**row) for row in counts
+        )
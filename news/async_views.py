@@ -0,0 +1,90 @@
+"""
+Асинхронные представления чтения для работы под ASGI.
+
+Включаются настройкой NEWS_ASYNC_VIEWS. Анонимный запрос без сессии
+обслуживается из кеша страниц прямо в цикле событий, вместе с ответом
+304 по сохранённому ETag: без базы данных и без перехода в поток.
+Промах кеша, запрос с сессией и POST передаются синхронным
+представлениям через sync_to_async.
+
+В Django 3.2 нет асинхронного ORM и асинхронного API кеша, поэтому
+обращения к ним собраны в функциях acache_call и aview: это единственные
+места, которые нужно поменять на aget() и async for после обновления.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+
+from . import views
+from .cache import page_key, page_version
+
+
+async def acache_call(function, *args):
+    """
+    Вызов функции кеша из асинхронного кода.
+
+    Кеш в памяти вызывается прямо в цикле событий. Остальные бэкенды
+    вызываются в пуле потоков, но не в общем потоке синхронного кода:
+    они потокобезопасны, и чтение не ждёт запросов к базе.
+    """
+    if isinstance(caches['default'], LocMemCache):
+        return function(*args)
+    return await sync_to_async(function, thread_sensitive=False)(*args)
+
+
+async def acache_get(key):
+    return await acache_call(cache.get, key)
+
+
+async def apage_version(pk=None):
+    return await acache_call(page_version, pk)
+
+
+def aview(view):
+    """Синхронное представление, вызываемое из асинхронного кода."""
+    return sync_to_async(view)
+
+
+def has_session(request):
+    """Без cookie сессии пользователь анонимен, база не нужна."""
+    return settings.SESSION_COOKIE_NAME in request.COOKIES
+
+
+async def cached_page(request, name, pk=None):
+    """Страница из кеша для анонима или None при промахе."""
+    if request.method != 'GET' or has_session(request):
+        return None
+    version = await apage_version(pk)
+    cached = await acache_get(
+        page_key(name, pk, version, request.GET.urlencode())
+    )
+    if cached is None:
+        return None
+    content, etag = cached
+    response = HttpResponse(content)
+    if etag:
+        response['ETag'] = etag
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+news_list_sync = aview(views.NewsList.as_view())
+news_detail_sync = aview(views.NewsDetailView.as_view())
+
+
+async def news_list(request):
+    """Главная страница."""
+    response = await cached_page(request, 'home')
+    if response is None:
+        response = await news_list_sync(request)
+    return response
+
+
+async def news_detail(request, pk):
+    """Страница новости; комментарии отправляются синхронным POST."""
+    response = await cached_page(request, 'detail', pk)
+    if response is None:
+        response = await news_detail_sync(request, pk=pk)
+    return response
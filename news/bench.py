@@ -0,0 +1,131 @@
+"""Общие инструменты для команд замера производительности."""
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import (
+    CaptureQueriesContext, setup_test_environment, teardown_test_environment
+)
+
+from .models import Comment, News, make_excerpt
+from .ratelimit import reset_rate_limits
+
+BATCH_SIZE = 1000
+# Все клиенты замера приходят с 127.0.0.1: ограничение частоты записи
+# отклоняло бы их запросы вместо того, чтобы их замерять.
+UNLIMITED_RATE = 10 ** 9
+
+
+@contextmanager
+def throwaway_database(verbosity=0, name=None):
+    """
+    Временная база данных для замера.
+
+    Рабочая база не затрагивается: создаётся тестовая база,
+    которая удаляется после выхода из контекста. Имя name задаёт
+    файл базы SQLite вместо базы в памяти, видимой только одному потоку.
+    """
+    test_settings = connection.settings_dict['TEST']
+    old_test_name = test_settings.get('NAME')
+    if name is not None:
+        test_settings['NAME'] = name
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(
+        verbosity=verbosity, autoclobber=True, serialize=False
+    )
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity)
+        teardown_test_environment()
+        test_settings['NAME'] = old_test_name
+
+
+@contextmanager
+def without_rate_limits():
+    """Отключает ограничение частоты записи комментариев на время замера."""
+    reset_rate_limits()
+    with override_settings(COMMENT_RATE_LIMITS={
+        'user': (UNLIMITED_RATE, 60), 'ip': (UNLIMITED_RATE, 60)
+    }):
+        try:
+            yield
+        finally:
+            reset_rate_limits()
+
+
+def seed(news_count, comments_per_news=0, users_count=1):
+    """Заполняет базу синтетическими новостями, комментариями и авторами."""
+    user_model = get_user_model()
+    user_model.objects.bulk_create(
+        user_model(username=f'bench-{index}') for index in range(users_count)
+    )
+    text = 'Просто текст. ' * 50
+    News.objects.bulk_create(
+        (
+            News(
+                title=f'Новость {index}', text=text,
+                excerpt=make_excerpt(text)
+            )
+            for index in range(news_count)
+        ),
+        batch_size=BATCH_SIZE
+    )
+    # SQLite не возвращает первичные ключи из bulk_create.
+    users = list(user_model.objects.filter(username__startswith='bench-'))
+    news = list(News.objects.only('pk'))
+    add_comments(news, comments_per_news, users)
+    return news, users
+
+
+def add_comments(news, comments_per_news, users):
+    """Добавляет каждой новости заданное число комментариев."""
+    Comment.objects.bulk_create(
+        (
+            Comment(
+                news=item,
+                author=users[index % len(users)],
+                text=f'Комментарий {index}. ' * 10
+            )
+            for item in news
+            for index in range(comments_per_news)
+        ),
+        batch_size=BATCH_SIZE
+    )
+
+
+@contextmanager
+def measure():
+    """
+    Замеряет время, число SQL-запросов и пик памяти внутри контекста.
+
+    Результат доступен в словаре, который возвращает контекст.
+    """
+    result = {}
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            yield result
+    finally:
+        result['seconds'] = time.perf_counter() - started
+        result['peak_kb'] = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    result['queries'] = len(queries)
+
+
+def percentile(values, percent):
+    """Перцентиль выборки методом ближайшего ранга."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(0, round(percent / 100 * len(ordered) + 0.5) - 1)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def median(values):
+    return statistics.median(values) if values else 0.0
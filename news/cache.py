@@ -0,0 +1,268 @@
+"""
+Кеш страниц новостей.
+
+Ключи страниц содержат номер версии: версия новости меняется при
+сохранении или удалении самой новости и её комментариев, версия главной
+страницы — при любом таком изменении. Старые записи после этого
+не читаются и вытесняются из кеша по таймауту.
+
+Здесь же валидаторы условных GET-запросов (ETag и Last-Modified):
+они читают только служебные столбцы новостей и не трогают комментарии,
+и кеш пользователей, которым пользуется CachedUserMiddleware.
+"""
+import copy
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model,
+    load_backend
+)
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+from .feed import get_feed
+from .models import News
+from .write_behind import comment_queue
+
+HOME_VERSION_KEY = 'news:home:version'
+NEWS_VERSION_KEY = 'news:{pk}:version'
+PAGE_KEY = 'news:page:{name}:{pk}:{version}:{page}'
+UPDATED_KEY = 'news:{pk}:updated:{version}'
+USER_KEY = 'news:user:{pk}'
+
+
+def get_version(key):
+    """Текущая версия; отсутствующая версия создаётся."""
+    version = cache.get(key)
+    if version is None:
+        # Версия из времени не совпадёт с версией вытесненного ключа,
+        # поэтому старые страницы не оживут.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def home_version():
+    return get_version(HOME_VERSION_KEY)
+
+
+def news_version(pk):
+    return get_version(NEWS_VERSION_KEY.format(pk=pk))
+
+
+def page_version(pk=None):
+    """Версия страниц новости или, без ключа новости, главной страницы."""
+    return news_version(pk) if pk else home_version()
+
+
+def page_key(name, pk, version, query):
+    return PAGE_KEY.format(name=name, pk=pk or '', version=version, page=query)
+
+
+def invalidate_home():
+    bump_version(HOME_VERSION_KEY)
+
+
+def invalidate_news(pk):
+    """Сбрасывает страницы новости и главную страницу."""
+    bump_version(NEWS_VERSION_KEY.format(pk=pk))
+    invalidate_home()
+
+
+def invalidate_user(pk):
+    cache.delete(USER_KEY.format(pk=pk))
+
+
+def user_snapshot(user):
+    """
+    Запись пользователя для кеша: копия без хеша пароля и хеш для
+    сверки с сессией (HMAC, из него пароль не получить). У копии
+    из кеша пароль — отложенное поле: обращение к нему читает базу,
+    а save() не перезаписывает пароль.
+    """
+    cached = copy.copy(user)
+    del cached.password
+    return cached, user.get_session_auth_hash()
+
+
+def get_cached_user(request):
+    """
+    Пользователь из сессии, как django.contrib.auth.get_user,
+    но сначала из кеша: запрос к auth_user выполняется один раз
+    за USER_CACHE_TIMEOUT секунд, а не на каждый запрос.
+
+    В кеше лежат поля пользователя без хеша пароля и хеш сессии,
+    с которым сверяется хеш из сессии. Запись сбрасывается при
+    сохранении и удалении пользователя, но только в кеше этого
+    процесса: с кешем в памяти процесса (locmem) другие процессы
+    видят смену пароля, блокировку или удаление пользователя
+    до USER_CACHE_TIMEOUT секунд спустя. Общий кеш (файловый, Redis,
+    Memcached) сбрасывает запись сразу для всех процессов.
+    """
+    try:
+        pk = get_user_model()._meta.pk.to_python(request.session[SESSION_KEY])
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except (KeyError, ValueError):
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+    key = USER_KEY.format(pk=pk)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        user = load_backend(backend_path).get_user(pk)
+        if user is None:
+            return AnonymousUser()
+        snapshot = user_snapshot(user)
+        cache.set(key, snapshot, settings.USER_CACHE_TIMEOUT)
+    user, user_hash = snapshot
+    user.backend = backend_path
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    if not (session_hash and constant_time_compare(session_hash, user_hash)):
+        request.session.flush()
+        return AnonymousUser()
+    return user
+
+
+def make_etag(request, *parts):
+    """
+    Значение ETag из переданных частей и состояния пользователя.
+
+    Аутентифицированный пользователь видит свою разметку и свой
+    CSRF-токен, поэтому они входят в ETag.
+    """
+    if request.user.is_authenticated:
+        parts += (request.user.pk, request.META.get('CSRF_COOKIE'))
+    raw = '|'.join(str(part) for part in parts)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def get_news(request, pk):
+    """
+    Новость, прочитанная один раз за запрос.
+
+    Её используют и валидаторы условного GET, и сама страница новости,
+    поэтому для страницы не нужен отдельный запрос.
+    """
+    if not hasattr(request, '_news'):
+        request._news = News.objects.filter(pk=pk).first()
+    return request._news
+
+
+def news_updated_at(request, pk):
+    """
+    Время последнего изменения новости или её комментариев.
+
+    Хранится в кеше под текущей версией новости: версия меняется
+    вместе с этим временем, поэтому условный GET и страница из кеша
+    не обращаются к базе. Вычисляется один раз за запрос.
+    """
+    if not hasattr(request, '_news_updated_at'):
+        key = UPDATED_KEY.format(pk=pk, version=news_version(pk))
+        updated_at = cache.get(key)
+        if updated_at is None:
+            news = get_news(request, pk)
+            updated_at = news.updated_at if news is not None else None
+            if updated_at is not None:
+                cache.set(key, updated_at, settings.NEWS_CACHE_TIMEOUT)
+        request._news_updated_at = updated_at
+    return request._news_updated_at
+
+
+def pending_comments(request, pk):
+    """Комментарии пользователя к новости, ещё стоящие в очереди записи."""
+    if not request.user.is_authenticated:
+        return []
+    return comment_queue.pending(pk, request.user.pk)
+
+
+def news_last_modified(request, pk, **kwargs):
+    # Комментарий в очереди ещё не сдвинул время изменения новости.
+    if pending_comments(request, pk):
+        return None
+    return news_updated_at(request, pk)
+
+
+def news_etag(request, pk, **kwargs):
+    updated_at = news_updated_at(request, pk)
+    if updated_at is None:
+        return None
+    return make_etag(
+        request, pk, updated_at.isoformat(),
+        len(pending_comments(request, pk))
+    )
+
+
+def home_etag(request, *args, **kwargs):
+    """
+    Значение ETag главной страницы по новостям, которые на ней показаны.
+
+    Берётся из готовой ленты, без запросов к базе. Last-Modified для
+    главной не отдаётся: после удаления новости в список попадает
+    более старая, и время изменения уменьшилось бы.
+    """
+    return make_etag(request, *(
+        f'{item.pk}:{item.updated_at.isoformat()}' for item in get_feed()
+    ))
+
+
+class AnonymousPageCacheMixin:
+    """
+    Кеширует целиком страницу для анонимных пользователей.
+
+    Аутентифицированные пользователи получают свежую страницу:
+    в ней есть их форма и ссылки на их комментарии. Общие для всех
+    части такой страницы кешируются фрагментами с той же версией.
+    """
+    page_cache_name = None
+
+    def get_page_cache_pk(self):
+        return self.kwargs.get('pk', '')
+
+    def get_page_cache_version(self):
+        return page_version(self.get_page_cache_pk())
+
+    def get_page_cache_key(self):
+        return page_key(
+            self.page_cache_name,
+            self.get_page_cache_pk(),
+            self.cache_version,
+            self.request.GET.urlencode(),
+        )
+
+    def get(self, request, *args, **kwargs):
+        self.cache_version = self.get_page_cache_version()
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+        key = self.get_page_cache_key()
+        cached = cache.get(key)
+        if cached is not None:
+            return HttpResponse(cached[0])
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            # ETag к этому моменту уже выставлен декоратором condition:
+            # он сохраняется вместе со страницей для асинхронного пути.
+            response.add_post_render_callback(
+                lambda response: cache.set(
+                    key,
+                    (response.content, response.get('ETag')),
+                    settings.NEWS_CACHE_TIMEOUT
+                )
+            )
+        return response
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['cache_version'] = self.cache_version
+        context['cache_timeout'] = settings.NEWS_CACHE_TIMEOUT
+        return context
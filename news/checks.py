@@ -0,0 +1,54 @@
+"""Проверки настроек при запуске, см. manage.py check."""
+from django.conf import settings
+from django.core.checks import Warning, register
+
+from .ratelimit import has_atomic_incr, is_process_local, limiter_cache
+
+
+@register()
+def check_rate_limit_cache(app_configs, **kwargs):
+    """Ограничитель частоты при нескольких процессах нуждается в общем кеше."""
+    if settings.COMMENT_RATE_LIMIT_PROCESSES < 2:
+        return []
+    backend = limiter_cache()
+    if is_process_local(backend):
+        return [Warning(
+            'Счётчики ограничителя частоты хранятся в памяти каждого '
+            'процесса: лимит действует в каждом из '
+            f'{settings.COMMENT_RATE_LIMIT_PROCESSES} процессов отдельно.',
+            hint=(
+                'Укажите в COMMENT_RATE_LIMIT_CACHE общий кеш '
+                'с атомарным incr: Memcached или Redis.'
+            ),
+            id='news.W001',
+        )]
+    if not has_atomic_incr(backend):
+        return [Warning(
+            'Кеш ограничителя частоты увеличивает счётчик чтением '
+            'и записью: одновременные запросы теряют приращения.',
+            hint=(
+                'Укажите в COMMENT_RATE_LIMIT_CACHE кеш с атомарным incr: '
+                'Memcached или Redis.'
+            ),
+            id='news.W002',
+        )]
+    return []
+
+
+@register()
+def check_write_behind_processes(app_configs, **kwargs):
+    """Очередь отложенной записи видна только своему процессу."""
+    if settings.COMMENT_WRITE_BEHIND and (
+        settings.NEWS_WEB_PROCESSES > 1
+    ):
+        return [Warning(
+            'Очередь отложенной записи комментариев хранится в памяти '
+            'процесса: другой процесс не покажет автору его комментарий '
+            'до сохранения и может ответить 304 по старому ETag.',
+            hint=(
+                'Включайте COMMENT_WRITE_BEHIND только с одним процессом '
+                'сервера (NEWS_WEB_PROCESSES=1).'
+            ),
+            id='news.W003',
+        )]
+    return []
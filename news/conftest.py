@@ -1,16 +1,25 @@
 import pytest
 from datetime import timedelta
 
+from django.core.cache import cache
 from django.utils import timezone
 from django.urls import reverse
 from django.conf import settings
 
 from news.models import News, Comment
+from news.ratelimit import reset_rate_limits
 
 COMMENT_TEXT = 'Текст комментария'
 NEW_COMMENT_TEXT = 'Обновлённый комментарий'
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Фикстура очистки кеша и счётчиков частоты запросов между тестами."""
+    cache.clear()
+    reset_rate_limits()
+
+
 @pytest.fixture
 def user(django_user_model):
     """Фикстура пользователь."""
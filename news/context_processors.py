@@ -0,0 +1,7 @@
+"""Переменные, общие для всех шаблонов."""
+from django.conf import settings
+
+
+def cache_timeouts(request):
+    """Время хранения шапки страницы в кеше фрагментов."""
+    return {'header_cache_timeout': settings.HEADER_CACHE_TIMEOUT}
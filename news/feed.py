@@ -0,0 +1,119 @@
+"""
+Готовая лента главной страницы.
+
+Лента — список последних новостей с усечённым текстом и числом
+комментариев — хранится в кеше целиком и перестраивается сигналами
+при изменении новостей и комментариев. Запрос к главной странице
+читает одну запись кеша и не обращается к базе данных.
+
+Сигналы обновляют кеш того процесса, который изменил данные. С кешем
+в памяти процесса (locmem) остальные процессы видят изменения только
+после того, как их копия ленты истечёт через NEWS_CACHE_TIMEOUT
+секунд. Чтобы лента обновлялась во всех процессах сразу, нужен общий
+кеш (file, Redis, Memcached).
+"""
+from collections import namedtuple
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, News
+
+FEED_KEY = 'news:home:feed'
+FEED_FIELDS = ('pk', 'title', 'date', 'excerpt', 'updated_at')
+
+FeedItem = namedtuple('FeedItem', (
+    'pk', 'title', 'date', 'excerpt', 'comment_count', 'updated_at'
+))
+
+
+def comment_count():
+    """Число опубликованных комментариев новости подзапросом по индексу."""
+    count = Comment.objects.published().filter(
+        news=OuterRef('pk')
+    ).order_by().values('news').annotate(
+        count=Count('pk')
+    ).values('count')
+    return Coalesce(Subquery(count), 0)
+
+
+def feed_queryset():
+    """
+    Новости с числом комментариев, посчитанным в том же запросе.
+
+    Читаются только нужные ленте столбцы: полный текст новости
+    не загружается.
+    """
+    return News.objects.only(*FEED_FIELDS).annotate(
+        comment_count=comment_count()
+    )
+
+
+def make_item(news):
+    return FeedItem(
+        pk=news.pk,
+        title=news.title,
+        date=news.date,
+        excerpt=news.excerpt,
+        comment_count=news.comment_count,
+        updated_at=news.updated_at,
+    )
+
+
+def build_feed():
+    return [
+        make_item(news)
+        for news in feed_queryset()[:settings.NEWS_COUNT_ON_HOME_PAGE]
+    ]
+
+
+def rebuild_feed():
+    feed = build_feed()
+    cache.set(FEED_KEY, feed, settings.NEWS_CACHE_TIMEOUT)
+    return feed
+
+
+def get_feed():
+    """Лента из кеша; при её отсутствии строится заново."""
+    feed = cache.get(FEED_KEY)
+    if feed is None:
+        feed = rebuild_feed()
+    return feed
+
+
+def news_changed(news):
+    """
+    Новость сохранена или удалена.
+
+    Лента перестраивается, только если новость в ней есть
+    или по дате попадает в неё.
+    """
+    feed = cache.get(FEED_KEY)
+    if feed is None:
+        return
+    news_date = news.date
+    if isinstance(news_date, datetime):
+        news_date = news_date.date()
+    in_feed = any(item.pk == news.pk for item in feed)
+    full = len(feed) >= settings.NEWS_COUNT_ON_HOME_PAGE
+    if in_feed or not full or news_date >= feed[-1].date:
+        rebuild_feed()
+
+
+def comment_changed(news_id):
+    """Комментарий изменился: обновляется только одна запись ленты."""
+    feed = cache.get(FEED_KEY)
+    if feed is None:
+        return
+    for index, item in enumerate(feed):
+        if item.pk == news_id:
+            news = feed_queryset().filter(pk=news_id).first()
+            if news is None:
+                rebuild_feed()
+                return
+            feed[index] = make_item(news)
+            cache.set(FEED_KEY, feed, settings.NEWS_CACHE_TIMEOUT)
+            return
@@ -0,0 +1,122 @@
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.test import Client
+from django.urls import reverse
+
+from news.archive import month_bounds, rebuild_counts
+from news.bench import BATCH_SIZE, median, throwaway_database
+from news.models import News
+from news.pagination import make_cursor
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет страницы архива на большой таблице: последний месяц '
+        'против самого старого, первая страница месяца против последней, '
+        'готовое число новостей за месяцы против подсчёта по всей '
+        'таблице, первый и последний раздел карты сайта.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--news', type=int, default=200_000)
+        parser.add_argument('--years', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def fill(self, options):
+        days = options['years'] * 365
+        first_day = date.today() - timedelta(days=days - 1)
+        for offset in range(0, options['news'], BATCH_SIZE):
+            News.objects.bulk_create(
+                News(
+                    title=f'Новость {index}', text='Текст',
+                    excerpt='Текст',
+                    date=first_day + timedelta(days=index * days // options[
+                        'news'
+                    ])
+                )
+                for index in range(
+                    offset, min(offset + BATCH_SIZE, options['news'])
+                )
+            )
+        rebuild_counts()
+        return first_day
+
+    def time(self, function, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+        return median(timings) * 1000
+
+    def last_page_cursor(self, year, month, size):
+        """Курсор последней страницы месяца."""
+        start, end = month_bounds(year, month)
+        month_news = News.objects.filter(
+            date__gte=start, date__lt=end
+        ).order_by('-date', '-pk')
+        offset = (month_news.count() - 1) // size * size
+        if not offset:
+            return None
+        row = month_news.values('date', 'pk')[offset - 1]
+        return make_cursor(row['date'], row['pk'])
+
+    def handle(self, *args, **options):
+        size = 50
+        with throwaway_database():
+            first_day = self.fill(options)
+            today = date.today()
+            client = Client()
+
+            def page(url, params=None):
+                def get():
+                    response = client.get(url, params or {})
+                    assert response.status_code == 200, url
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                return get
+
+            def old_counts():
+                list(News.objects.order_by().annotate(
+                    year=ExtractYear('date'), month=ExtractMonth('date')
+                ).values('year', 'month').annotate(count=Count('pk')))
+
+            cursor = self.last_page_cursor(
+                first_day.year, first_day.month, size
+            )
+            old_month = reverse(
+                'news:archive_month', args=(first_day.year, first_day.month)
+            )
+            sections = (options['news'] - 1) // 50_000
+            cases = (
+                ('архив: готовые числа', page(reverse('news:archive'))),
+                ('архив: подсчёт по таблице', old_counts),
+                ('последний месяц', page(reverse(
+                    'news:archive_month', args=(today.year, today.month)
+                ))),
+                ('самый старый месяц', page(old_month)),
+                (
+                    'он же, последняя страница',
+                    page(old_month, {'after': cursor} if cursor else None)
+                ),
+                ('карта сайта: индекс', page(reverse('news:sitemap'))),
+                ('карта сайта: раздел 0', page(
+                    reverse('news:sitemap_section', args=(0,))
+                )),
+                (f'карта сайта: раздел {sections}', page(
+                    reverse('news:sitemap_section', args=(sections,))
+                )),
+            )
+            self.stdout.write(
+                f'{options["news"]} новостей за {options["years"]} лет'
+            )
+            for title, function in cases:
+                function()
+                self.stdout.write(
+                    f'{title:<30} '
+                    f'{self.time(function, options["repeat"]):>8.2f} мс'
+                )
@@ -0,0 +1,104 @@
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import reload
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+from django.urls import clear_url_caches, reverse
+
+import news.urls
+import yanews.urls
+from news.bench import percentile, seed, throwaway_database
+
+
+def reload_urls():
+    reload(news.urls)
+    reload(yanews.urls)
+    clear_url_caches()
+
+
+async def run_asgi(urls, concurrency):
+    """Запросы через ASGI-обработчик, concurrency одновременных задач."""
+    client = AsyncClient()
+    latencies = []
+    pending = iter(urls)
+
+    async def worker():
+        for url in pending:
+            started = time.perf_counter()
+            await client.get(url)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+def run_wsgi(urls, concurrency):
+    """Запросы через WSGI-обработчик из пула в concurrency потоков."""
+    local = threading.local()
+
+    def request(url):
+        if not hasattr(local, 'client'):
+            local.client = Client()
+        started = time.perf_counter()
+        local.client.get(url)
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        return list(pool.map(request, urls))
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает синхронные представления под ASGI, асинхронные '
+        'представления под ASGI и WSGI при разном числе одновременных '
+        'соединений. Запросы идут в обработчики Django внутри процесса, '
+        'без сетевого сервера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, nargs='+', default=[1, 10, 50, 200]
+        )
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--news', type=int, default=100)
+
+    def handle(self, *args, **options):
+        generator = random.Random(0)
+        with throwaway_database():
+            news, _ = seed(options['news'], comments_per_news=20)
+            urls = [
+                reverse('news:home') if generator.random() < 0.4
+                else reverse('news:detail', args=(generator.choice(news).pk,))
+                for _ in range(options['requests'])
+            ]
+            variants = (
+                ('sync/ASGI', False, lambda c: asyncio.run(run_asgi(urls, c))),
+                ('async/ASGI', True, lambda c: asyncio.run(run_asgi(urls, c))),
+                ('WSGI', False, lambda c: run_wsgi(urls, c)),
+            )
+            self.stdout.write(
+                'вариант      соединений  запросов/с  p50, мс  p99, мс'
+            )
+            for title, async_views, run in variants:
+                with override_settings(NEWS_ASYNC_VIEWS=async_views):
+                    reload_urls()
+                    cache.clear()
+                    # Прогрев: дальше замеряется установившийся режим,
+                    # в котором страницы анонимов лежат в кеше.
+                    run(1)
+                    for concurrency in options['concurrency']:
+                        started = time.perf_counter()
+                        latencies = run(concurrency)
+                        elapsed = time.perf_counter() - started
+                        self.stdout.write(
+                            f'{title:<12} {concurrency:>10} '
+                            f'{len(latencies) / elapsed:>11.0f} '
+                            f'{percentile(latencies, 50) * 1000:>8.2f} '
+                            f'{percentile(latencies, 99) * 1000:>8.2f}'
+                        )
+            reload_urls()
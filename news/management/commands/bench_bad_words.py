@@ -0,0 +1,70 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from news.profanity import BadWordsMatcher
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщыэюя'
+CLEAN_TEXT = (
+    'Спасибо за новость, очень интересно было почитать про то, как '
+    'развивается проект и что планируют сделать дальше. '
+) * 8
+
+
+def loop_search(words, text):
+    """Прежний способ: отдельный поиск подстроки для каждого слова."""
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return word
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск запрещённых слов циклом по списку '
+        'и скомпилированным выражением.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[10, 1000, 10000],
+            help='Размеры списка запрещённых слов.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=200,
+            help='Сколько раз проверять текст на каждом шаге.'
+        )
+
+    def timed(self, function, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        return (time.perf_counter() - started) / repeat * 1_000_000
+
+    def handle(self, *args, **options):
+        generator = random.Random(0)
+        repeat = options['repeat']
+        self.stdout.write(
+            'слов    сборка, мс  цикл, мкс  выражение, мкс  ускорение'
+        )
+        for size in options['sizes']:
+            words = [
+                ''.join(generator.choices(ALPHABET, k=generator.randint(5, 9)))
+                for _ in range(size)
+            ]
+            started = time.perf_counter()
+            matcher = BadWordsMatcher(words)
+            build_ms = (time.perf_counter() - started) * 1000
+            # Чистый текст — худший случай: просматривается целиком.
+            words = [word for word in words if word not in CLEAN_TEXT]
+            matcher = BadWordsMatcher(words)
+            loop_us = self.timed(
+                lambda: loop_search(words, CLEAN_TEXT), repeat
+            )
+            regex_us = self.timed(lambda: matcher.search(CLEAN_TEXT), repeat)
+            self.stdout.write(
+                f'{size:<7} {build_ms:>10.1f}  {loop_us:>9.1f}  '
+                f'{regex_us:>14.1f}  {loop_us / regex_us:>8.1f}x'
+            )
@@ -0,0 +1,129 @@
+import os
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from news.bench import (
+    percentile, seed, throwaway_database, without_rate_limits
+)
+from news.models import Comment
+from news.write_behind import comment_queue
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет пропускную способность записи комментариев через '
+        'NewsComment при нескольких одновременных авторах: SQLite '
+        'с настройками по умолчанию против режима WAL '
+        'с synchronous=NORMAL, без очереди и с отложенной записью. '
+        'Каждый вариант работает с новым файлом базы; PostgreSQL '
+        'замеряется с NEWS_DATABASE=postgresql.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, nargs='+', default=[1, 4, 8]
+        )
+        parser.add_argument('--comments', type=int, default=200)
+
+    def run(self, threads, comments, news, users):
+        """Каждый поток публикует comments комментариев от своего автора."""
+        latencies, errors = [], []
+        lock = threading.Lock()
+
+        def writer(user):
+            client = Client()
+            client.force_login(user)
+            local = []
+            try:
+                for index in range(comments):
+                    url = reverse(
+                        'news:detail', args=(news[index % len(news)].pk,)
+                    )
+                    started = time.perf_counter()
+                    try:
+                        response = client.post(
+                            url, {'text': f'Комментарий {index}'}
+                        )
+                        assert response.status_code == 302
+                    except Exception as error:
+                        with lock:
+                            errors.append(error)
+                        continue
+                    local.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+            with lock:
+                latencies.extend(local)
+
+        workers = [
+            threading.Thread(target=writer, args=(users[index],))
+            for index in range(threads)
+        ]
+        self.started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return latencies, errors, time.perf_counter() - self.started
+
+    def report(self, title, options):
+        threads = sorted(options['threads'])
+        news, users = seed(10, users_count=threads[-1])
+        # Соединение, которое создало базу, закрывается: потоки
+        # открывают свои, и режим журнала задаётся при открытии.
+        connections.close_all()
+        for count in threads:
+            latencies, errors, elapsed = self.run(
+                count, options['comments'], news, users
+            )
+            # Отложенные комментарии дописываются в базу: последняя
+            # колонка — скорость до полного сохранения.
+            comment_queue.drain()
+            saved = Comment.objects.count()
+            stored = time.perf_counter() - self.started
+            connection.close()
+            self.stdout.write(
+                f'{title:<20} {count:>7} '
+                f'{len(latencies) / elapsed:>10.0f} '
+                f'{percentile(latencies, 50) * 1000:>8.2f} '
+                f'{percentile(latencies, 99) * 1000:>8.2f} '
+                f'{len(errors):>7} '
+                f'{len(latencies) / stored:>11.0f}'
+            )
+            assert saved == self.saved + len(latencies)
+            self.saved = saved
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            'вариант              потоков  записей/с  p50, мс  p99, мс  '
+            'ошибок  в базе, /с'
+        )
+        if connection.vendor != 'sqlite':
+            variants = ((connection.vendor, None, False), (
+                f'{connection.vendor}, очередь', None, True
+            ))
+        else:
+            variants = (
+                ('по умолчанию', False, False),
+                ('WAL, NORMAL', True, False),
+                ('WAL, NORMAL, очередь', True, True),
+            )
+        for title, tuning, write_behind in variants:
+            with tempfile.TemporaryDirectory() as directory:
+                if tuning is None:
+                    name = None
+                else:
+                    name = os.path.join(directory, 'bench.sqlite3')
+                with override_settings(
+                    NEWS_SQLITE_TUNING=bool(tuning),
+                    COMMENT_WRITE_BEHIND=write_behind,
+                ), without_rate_limits():
+                    with throwaway_database(name=name):
+                        self.saved = 0
+                        self.report(title, options)
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from news.bench import add_comments, measure, seed, throwaway_database
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет число запросов и пик памяти главной страницы '
+        'при росте числа комментариев к новостям.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--steps', type=int, nargs='+', default=[0, 10, 100, 1000],
+            help='Сколько комментариев на новость на каждом шаге.'
+        )
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            news, users = seed(settings.NEWS_COUNT_ON_HOME_PAGE)
+            client = Client()
+            url = reverse('news:home')
+            client.get(url)
+            total = 0
+            self.stdout.write('комментариев/новость  запросов  пик, КБ  мс')
+            for step in sorted(options['steps']):
+                add_comments(news, step - total, users)
+                total = step
+                # Замеряется худший случай: лента и страница строятся заново.
+                cache.clear()
+                with measure() as result:
+                    response = client.get(url)
+                assert response.status_code == 200
+                self.stdout.write(
+                    f'{step:>20}  {result["queries"]:>8}  '
+                    f'{result["peak_kb"]:>7.0f}  '
+                    f'{result["seconds"] * 1000:.1f}'
+                )
@@ -0,0 +1,76 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from news.bench import median, seed, throwaway_database
+from news.metrics import registry
+
+METRICS_MIDDLEWARE = 'news.middleware.RequestMetricsMiddleware'
+
+
+class Command(BaseCommand):
+    help = 'Замеряет накладные расходы RequestMetricsMiddleware.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+
+    def timings(self, clients, url, requests_count):
+        """
+        Медианы времени запроса для каждого клиента.
+
+        Запросы клиентов чередуются, чтобы фоновые колебания нагрузки
+        одинаково влияли на оба варианта.
+        """
+        values = [[] for _ in clients]
+        for _ in range(requests_count):
+            for client, client_values in zip(clients, values):
+                started = time.perf_counter()
+                client.get(url)
+                client_values.append(time.perf_counter() - started)
+        return [median(client_values) * 1_000_000 for client_values in values]
+
+    def handle(self, *args, **options):
+        middleware = [
+            name for name in settings.MIDDLEWARE if name != METRICS_MIDDLEWARE
+        ]
+        variants = (
+            ('без метрик', middleware, False),
+            ('с метриками', [METRICS_MIDDLEWARE, *middleware], True),
+        )
+        with throwaway_database():
+            news, users = seed(10, comments_per_news=20)
+            cases = (
+                ('главная, аноним (кеш)', None, reverse('news:home')),
+                (
+                    'новость, автор',
+                    users[0],
+                    reverse('news:detail', args=(news[0].pk,))
+                ),
+            )
+            for title, user, url in cases:
+                clients = []
+                for _, variant_middleware, enabled in variants:
+                    # Цепочка middleware клиента собирается при первом
+                    # запросе и дальше не меняется.
+                    with override_settings(
+                        MIDDLEWARE=variant_middleware,
+                        NEWS_METRICS_ENABLED=enabled
+                    ):
+                        client = Client()
+                        if user is not None:
+                            client.force_login(user)
+                        client.get(url)
+                    clients.append(client)
+                before, after = self.timings(
+                    clients, url, options['requests']
+                )
+                self.stdout.write(
+                    f'{title:<24} без метрик {before:>8.0f} мкс, '
+                    f'с метриками {after:>8.0f} мкс, '
+                    f'накладные {after - before:>+6.0f} мкс '
+                    f'({(after - before) / before:+.1%})'
+                )
+        registry.clear()
@@ -0,0 +1,109 @@
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+
+from news.bench import BATCH_SIZE, seed, throwaway_database
+from news.models import Comment
+from news.moderation import (
+    Moderator, analyse, check_inline, pending_batch, save_verdicts
+)
+
+WORDS = (
+    'новость', 'проект', 'город', 'спасибо', 'интересно', 'почитать',
+    'команда', 'решение', 'вопрос', 'ответ', 'время', 'работа', 'люди',
+    'сегодня', 'завтра', 'хорошо', 'плохо', 'думаю', 'согласен', 'нет',
+)
+SPAM = 'Лучшие цены только у нас, заходите на http://example.com'
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет модерацию комментариев: время быстрых проверок '
+        'в запросе против всех проверок и пропускную способность '
+        'команды moderate_comments с пулом процессов разного размера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comments', type=int, default=20_000)
+        parser.add_argument('--words', type=int, default=60)
+        parser.add_argument(
+            '--workers', type=int, nargs='+', default=[0, 2, 4]
+        )
+
+    def texts(self, options, generator):
+        for index in range(options['comments']):
+            if index % 50 == 0:
+                yield SPAM
+            else:
+                yield ' '.join(generator.choices(WORDS, k=options['words']))
+
+    def per_comment(self, texts):
+        """Среднее время проверки одного текста, мкс."""
+        started = time.perf_counter()
+        for text in texts:
+            check_inline(text)
+        inline = time.perf_counter() - started
+        started = time.perf_counter()
+        for text in texts:
+            check_inline(text)
+            analyse(text)
+        full = time.perf_counter() - started
+        return (
+            inline / len(texts) * 1_000_000, full / len(texts) * 1_000_000
+        )
+
+    def run(self, workers, batch_size):
+        Comment.objects.update(
+            status=Comment.Status.PENDING, moderation_reason=''
+        )
+        pool = ProcessPoolExecutor(workers, initializer=django.setup) if (
+            workers
+        ) else None
+        try:
+            moderator = Moderator(pool, workers or 1)
+            # Пул запускает процессы при первой пачке: она не в замере.
+            if pool is not None:
+                list(pool.map(analyse, ['разогрев'] * workers))
+            started = time.perf_counter()
+            total = 0
+            while True:
+                rows = pending_batch(batch_size)
+                if not rows:
+                    break
+                save_verdicts(moderator.moderate(rows))
+                total += len(rows)
+            return total / (time.perf_counter() - started)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+    def handle(self, *args, **options):
+        generator = random.Random(0)
+        texts = list(self.texts(options, generator))
+        with throwaway_database():
+            news, users = seed(10, users_count=100)
+            Comment.objects.bulk_create(
+                (
+                    Comment(
+                        news=news[index % len(news)],
+                        author=users[index % len(users)], text=text
+                    )
+                    for index, text in enumerate(texts)
+                ),
+                batch_size=BATCH_SIZE
+            )
+            inline, full = self.per_comment(texts[:2000])
+            self.stdout.write(
+                f'В запросе: быстрые проверки {inline:.1f} мкс, '
+                f'все проверки были бы {full:.1f} мкс на комментарий'
+            )
+            for batch_size in (100, 1000):
+                for workers in options['workers']:
+                    rate = self.run(workers, batch_size)
+                    self.stdout.write(
+                        f'пачка {batch_size:>5}, процессов {workers}: '
+                        f'{rate:>8.0f} комментариев в секунду'
+                    )
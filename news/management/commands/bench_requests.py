@@ -0,0 +1,193 @@
+import json
+import random
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news.bench import (
+    median, percentile, seed, throwaway_database, without_rate_limits
+)
+from news.models import Comment
+
+# Набор запросов по умолчанию: маршрут, метод, вес, нужен ли вход.
+DEFAULT_MIX = (
+    {'name': 'news:home', 'method': 'get', 'weight': 40},
+    {'name': 'news:detail', 'method': 'get', 'weight': 35},
+    {'name': 'news:comments', 'method': 'get', 'weight': 5},
+    {'name': 'news:detail', 'method': 'get', 'weight': 10, 'auth': True},
+    {'name': 'news:detail', 'method': 'post', 'weight': 5, 'auth': True},
+    {'name': 'news:edit', 'method': 'post', 'weight': 3, 'auth': True},
+    {'name': 'news:delete', 'method': 'post', 'weight': 2, 'auth': True},
+)
+WRITE_ROUTES = ('news:edit', 'news:delete')
+
+
+def read_mix(path):
+    """
+    Набор запросов из файла JSON Lines.
+
+    Каждая строка — объект с полями name (имя маршрута), method,
+    weight и необязательным auth.
+    """
+    mix = []
+    with open(path, encoding='utf-8') as file:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if 'name' not in item:
+                raise CommandError(
+                    f'{path}:{line_number}: нет имени маршрута (name).'
+                )
+            mix.append(item)
+    return mix
+
+
+class Replay:
+    """Состояние воспроизведения: клиенты и комментарии авторов."""
+
+    def __init__(self, news, users, generator):
+        self.news_pks = [item.pk for item in news]
+        self.users = users
+        self.generator = generator
+        self.anonymous = Client()
+        self.clients = {}
+        self.comments = defaultdict(list)
+        for pk, author_id in Comment.objects.values_list('pk', 'author_id'):
+            self.comments[author_id].append(pk)
+
+    def client_for(self, user):
+        if user.pk not in self.clients:
+            self.clients[user.pk] = Client()
+            self.clients[user.pk].force_login(user)
+        return self.clients[user.pk]
+
+    def prepare(self, item):
+        """Клиент, адрес и данные для одного запроса из набора."""
+        name = item['name']
+        user = self.generator.choice(self.users)
+        if name in WRITE_ROUTES:
+            owned = self.comments[user.pk]
+            if not owned:
+                return None
+            pk = self.generator.choice(owned)
+            if name == 'news:delete':
+                owned.remove(pk)
+            args = (pk,)
+        elif name == 'news:home':
+            args = ()
+        else:
+            args = (self.generator.choice(self.news_pks),)
+        client = (
+            self.client_for(user) if item.get('auth') else self.anonymous
+        )
+        data = {'text': 'Комментарий из нагрузочного теста'}
+        return client, reverse(name, args=args), data
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет временную базу синтетическими данными и воспроизводит '
+        'смесь запросов к приложению news. Для каждого маршрута выводятся '
+        'p50/p95/p99 задержки, пропускная способность и число SQL-запросов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--news', type=int, default=200)
+        parser.add_argument('--comments', type=int, default=20,
+                            help='Комментариев на новость.')
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--mix', help='Файл JSON Lines с набором запросов.'
+        )
+        parser.add_argument(
+            '--save', help='Сохранить результаты в JSON как базовую линию.'
+        )
+        parser.add_argument(
+            '--baseline', help='Сравнить p50 с сохранённой базовой линией.'
+        )
+
+    def handle(self, *args, **options):
+        mix = read_mix(options['mix']) if options['mix'] else DEFAULT_MIX
+        generator = random.Random(options['seed'])
+        weights = [item.get('weight', 1) for item in mix]
+        with throwaway_database(), without_rate_limits():
+            cache.clear()
+            news, users = seed(
+                options['news'], options['comments'], options['users']
+            )
+            replay = Replay(news, users, generator)
+            results = self.replay(replay, mix, weights, options['requests'])
+        cache.clear()
+        self.report(results, options['baseline'])
+        if options['save']:
+            with open(options['save'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+
+    def replay(self, replay, mix, weights, requests_count):
+        timings = defaultdict(list)
+        queries = defaultdict(list)
+        started = time.perf_counter()
+        for item in replay.generator.choices(mix, weights, k=requests_count):
+            prepared = replay.prepare(item)
+            if prepared is None:
+                continue
+            client, url, data = prepared
+            method = item.get('method', 'get')
+            key = f'{item["name"]} {method.upper()}'
+            if item.get('auth'):
+                key += ' (auth)'
+            with CaptureQueriesContext(connection) as captured:
+                request_started = time.perf_counter()
+                response = getattr(client, method)(
+                    url, data=data if method == 'post' else None
+                )
+                timings[key].append(time.perf_counter() - request_started)
+            queries[key].append(len(captured))
+            if response.status_code >= 400:
+                raise CommandError(f'{key} {url}: {response.status_code}')
+        elapsed = time.perf_counter() - started
+        return {
+            'throughput': sum(map(len, timings.values())) / elapsed,
+            'routes': {
+                key: {
+                    'count': len(values),
+                    'p50_ms': percentile(values, 50) * 1000,
+                    'p95_ms': percentile(values, 95) * 1000,
+                    'p99_ms': percentile(values, 99) * 1000,
+                    'queries': median(queries[key]),
+                }
+                for key, values in sorted(timings.items())
+            },
+        }
+
+    def report(self, results, baseline_path):
+        baseline = {}
+        if baseline_path:
+            with open(baseline_path, encoding='utf-8') as file:
+                baseline = json.load(file)['routes']
+        self.stdout.write(
+            f'{"маршрут":<32} {"n":>5} {"p50":>7} {"p95":>7} {"p99":>7} '
+            f'{"SQL":>4}' + ('   Δp50' if baseline else '')
+        )
+        for key, route in results['routes'].items():
+            line = (
+                f'{key:<32} {route["count"]:>5} {route["p50_ms"]:>7.2f} '
+                f'{route["p95_ms"]:>7.2f} {route["p99_ms"]:>7.2f} '
+                f'{route["queries"]:>4.0f}'
+            )
+            if key in baseline:
+                before = baseline[key]['p50_ms']
+                line += f' {(route["p50_ms"] - before) / before:>+6.0%}'
+            self.stdout.write(line)
+        self.stdout.write(
+            f'Пропускная способность: {results["throughput"]:.0f} запросов/с'
+        )
@@ -0,0 +1,136 @@
+import os
+import random
+import tempfile
+import time
+from itertools import accumulate
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from news.bench import BATCH_SIZE, percentile, seed, throwaway_database
+from news.models import Comment
+from news.search import STOP_WORDS, search
+
+SYLLABLES = (
+    'ба', 'ве', 'го', 'да', 'жи', 'зо', 'ка', 'ле', 'ми', 'но', 'пра', 'ро',
+    'сти', 'то', 'ху', 'ча', 'ше', 'мо', 'ви', 'ну', 'ры', 'ло', 'де', 'ко',
+)
+# Согласные в конце основы, которые стеммер не принимает за суффикс:
+# все формы псевдослова сводятся к одной основе, как у настоящих слов.
+FINALS = ('б', 'г', 'д', 'з', 'к', 'р')
+ENDINGS = ('', 'а', 'ы', 'ой', 'ами', 'ов', 'ом', 'ах', 'у', 'е')
+
+
+def vocabulary(size, generator):
+    """Основы псевдослов из слогов, к ним добавляются окончания."""
+    words = set()
+    while len(words) < size:
+        words.add(''.join(
+            generator.choice(SYLLABLES) for _ in range(generator.randint(1, 3))
+        ) + generator.choice(FINALS))
+    return sorted(words)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время поискового запроса на большом индексе: '
+        'комментарии из слов с распределением Ципфа, служебные слова '
+        'на первых местах, как в настоящих текстах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--words', type=int, default=20)
+        parser.add_argument('--vocabulary', type=int, default=50_000)
+        parser.add_argument('--queries', type=int, default=300)
+        parser.add_argument(
+            '--budget', type=float, default=50.0,
+            help='Бюджет p99 времени запроса, мс.'
+        )
+
+    def texts(self, options, generator):
+        stems = vocabulary(options['vocabulary'], generator)
+        self.stems = stems
+        words = sorted(STOP_WORDS) + stems
+        weights = list(accumulate(
+            1 / rank for rank in range(1, len(words) + 1)
+        ))
+        while True:
+            sample = generator.choices(
+                words, cum_weights=weights, k=options['words']
+            )
+            yield ' '.join(
+                word if word in STOP_WORDS
+                else word + generator.choice(ENDINGS)
+                for word in sample
+            )
+
+    def fill(self, options, generator):
+        news, users = seed(100)
+        texts = self.texts(options, generator)
+        started = time.perf_counter()
+        for offset in range(0, options['rows'], BATCH_SIZE):
+            Comment.objects.bulk_create(
+                Comment(
+                    news=news[index % len(news)], author=users[0],
+                    text=next(texts)
+                )
+                for index in range(
+                    offset, min(offset + BATCH_SIZE, options['rows'])
+                )
+            )
+        self.stdout.write(
+            f'{options["rows"]} комментариев проиндексировано за '
+            f'{time.perf_counter() - started:.0f} с'
+        )
+
+    def queries(self, options, generator):
+        """Частые, средние и редкие слова, по одному и парами."""
+        stems = self.stems
+        groups = {
+            'частое слово': stems[:100],
+            'среднее слово': stems[1000:5000],
+            'редкое слово': stems[-10000:],
+        }
+        for title, words in groups.items():
+            yield title, [
+                generator.choice(words) + generator.choice(ENDINGS)
+                for _ in range(options['queries'])
+            ]
+        yield 'два слова', [
+            f'{generator.choice(stems[:1000])} '
+            f'{generator.choice(stems[:5000])}'
+            for _ in range(options['queries'])
+        ]
+
+    def handle(self, *args, **options):
+        generator = random.Random(0)
+        with tempfile.TemporaryDirectory() as directory:
+            name = None
+            if connection.vendor == 'sqlite':
+                name = os.path.join(directory, 'bench.sqlite3')
+            with throwaway_database(name=name):
+                self.fill(options, generator)
+                self.stdout.write(
+                    'запрос            p50, мс  p99, мс  результатов'
+                )
+                worst = 0.0
+                for title, queries in self.queries(options, generator):
+                    latencies, found = [], 0
+                    for query in queries:
+                        started = time.perf_counter()
+                        found += len(search(query))
+                        latencies.append(time.perf_counter() - started)
+                    p99 = percentile(latencies, 99) * 1000
+                    worst = max(worst, p99)
+                    self.stdout.write(
+                        f'{title:<16} {percentile(latencies, 50) * 1000:>8.2f}'
+                        f' {p99:>8.2f} {found / len(queries):>12.1f}'
+                    )
+                verdict = 'в бюджете' if worst <= options['budget'] else (
+                    'бюджет превышен'
+                )
+                self.stdout.write(
+                    f'Худший p99 {worst:.2f} мс при бюджете '
+                    f'{options["budget"]:.0f} мс: {verdict}.'
+                )
@@ -0,0 +1,79 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news.bench import median, seed, throwaway_database
+
+STOCK_AUTH = 'django.contrib.auth.middleware.AuthenticationMiddleware'
+CACHED_AUTH = 'news.middleware.CachedUserMiddleware'
+
+
+def middleware(auth):
+    return [
+        auth if path in (STOCK_AUTH, CACHED_AUTH) else path
+        for path in settings.MIDDLEWARE
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает хранилища сессий и загрузку пользователя для '
+        'аутентифицированных запросов: SQL-запросов на запрос и время '
+        'ответа главной страницы и страницы новости.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+
+    def measure(self, client, url, count):
+        client.get(url)
+        timings, queries = [], 0
+        for _ in range(count):
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as captured:
+                client.get(url)
+            timings.append(time.perf_counter() - started)
+            queries += len(captured)
+        return queries / count, median(timings) * 1000
+
+    def handle(self, *args, **options):
+        engines = settings.NEWS_SESSION_ENGINES
+        variants = (
+            ('db, пользователь из базы', engines['db'], STOCK_AUTH),
+            ('db, пользователь из кеша', engines['db'], CACHED_AUTH),
+            ('cached_db, из кеша', engines['cached_db'], CACHED_AUTH),
+            ('signed_cookies, из кеша', engines['signed_cookies'],
+             CACHED_AUTH),
+        )
+        with throwaway_database():
+            news, users = seed(10, comments_per_news=20)
+            pages = (
+                ('главная', reverse('news:home')),
+                ('новость', reverse('news:detail', args=(news[0].pk,))),
+            )
+            self.stdout.write(
+                f'{"вариант":<28} {"страница":<9} {"SQL":>5} {"мс":>7}'
+            )
+            baseline = {}
+            for title, engine, auth in variants:
+                with override_settings(
+                    SESSION_ENGINE=engine, MIDDLEWARE=middleware(auth)
+                ):
+                    cache.clear()
+                    client = Client()
+                    client.force_login(users[0])
+                    for page, url in pages:
+                        queries, ms = self.measure(
+                            client, url, options['requests']
+                        )
+                        saved = baseline.setdefault(page, queries) - queries
+                        self.stdout.write(
+                            f'{title:<28} {page:<9} {queries:>5.1f} '
+                            f'{ms:>7.2f}  (-{saved:.1f} SQL)'
+                        )
@@ -0,0 +1,72 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.test import Client
+from django.urls import reverse
+
+from news.bench import add_comments, measure, seed, throwaway_database
+from news.models import Comment
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает страницу всей ветки комментариев, собранную целиком '
+        'в памяти, с потоковой news:thread: время до первого байта, '
+        'общее время и пик памяти при росте ветки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--steps', type=int, nargs='+', default=[100, 1000, 10000],
+            help='Число комментариев в ветке на каждом шаге.'
+        )
+
+    def whole(self, news):
+        """Прежний способ: все комментарии в памяти, одна отрисовка."""
+        comments = list(
+            Comment.objects.filter(news=news).select_related('author')
+        )
+        return render_to_string(
+            'news/comments.html', {'comments': comments, 'news_id': news.pk}
+        ).encode()
+
+    def streamed(self, client, url):
+        """Потоковый ответ: первый байт и дочитывание по пачкам."""
+        response = client.get(url)
+        chunks = iter(response.streaming_content)
+        next(chunks)
+        first_byte = time.perf_counter()
+        for _ in chunks:
+            pass
+        return first_byte
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            news, users = seed(1)
+            news = news[0]
+            url = reverse('news:thread', args=(news.pk,))
+            client = Client()
+            client.get(url)
+            total = 0
+            self.stdout.write(
+                'комментариев  вариант      первый байт, мс  всего, мс  '
+                'пик, КБ'
+            )
+            for step in sorted(options['steps']):
+                add_comments([news], step - total, users)
+                total = step
+                with measure() as result:
+                    self.whole(news)
+                # Целиком собранная страница уходит только после отрисовки.
+                self.report(step, 'в памяти', result, result['seconds'])
+                with measure() as result:
+                    started = time.perf_counter()
+                    first_byte = self.streamed(client, url) - started
+                self.report(step, 'поток', result, first_byte)
+
+    def report(self, step, title, result, first_byte):
+        self.stdout.write(
+            f'{step:>12}  {title:<10} {first_byte * 1000:>16.1f} '
+            f'{result["seconds"] * 1000:>10.1f} {result["peak_kb"]:>8.0f}'
+        )
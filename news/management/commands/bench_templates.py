@@ -0,0 +1,102 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory, override_settings
+from django.utils import timezone
+
+from news.bench import median
+from news.models import News
+
+DUMMY_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+}
+LOCMEM_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+}
+
+
+def make_engine(cached):
+    options = dict(settings.TEMPLATES[0]['OPTIONS'])
+    options['loaders'] = (
+        [('django.template.loaders.cached.Loader', settings.TEMPLATE_LOADERS)]
+        if cached else settings.TEMPLATE_LOADERS
+    )
+    return DjangoTemplates({
+        'NAME': 'bench',
+        'DIRS': settings.TEMPLATES[0]['DIRS'],
+        'APP_DIRS': False,
+        'OPTIONS': options,
+    })
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет отрисовку news/detail.html с большим числом комментариев: '
+        'загрузчики без кеша и без кеша фрагментов против профиля '
+        'production с кешированными загрузчиками и кешем шапки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comments', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=30)
+
+    def context(self, comments_count):
+        """Контекст страницы без базы данных: объекты только в памяти."""
+        news = News(pk=1, title='Новость', text='Текст новости. ' * 50)
+        news.date = timezone.now().date()
+        created = timezone.now()
+        # Комментарии в том виде, в каком их отдаёт news.views.comment_rows.
+        comments = [
+            {
+                'id': index, 'created': created, 'author_id': 1,
+                'author_name': 'Автор',
+                'text': f'Комментарий {index}\nвторая строка',
+            }
+            for index in range(comments_count)
+        ]
+        return {
+            'news': news,
+            'object': news,
+            'comments': comments,
+            'next_cursor': None,
+            'cache_version': 1,
+            'cache_timeout': 300,
+        }
+
+    def measure(self, engine, context, repeat):
+        """Медианы времени загрузки шаблона и полной отрисовки, мс."""
+        request = RequestFactory().get('/news/1/')
+        request.user = AnonymousUser()
+        loading, rendering = [], []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            # Шаблон запрашивается заново, как при каждом запросе.
+            template = engine.get_template('news/detail.html')
+            loaded = time.perf_counter()
+            template.render(context, request)
+            loading.append(loaded - started)
+            rendering.append(time.perf_counter() - started)
+        return median(loading) * 1000, median(rendering) * 1000
+
+    def handle(self, *args, **options):
+        context = self.context(options['comments'])
+        variants = (
+            ('загрузчики без кеша, без кеша фрагментов', False, DUMMY_CACHE),
+            ('production: кеш загрузчиков и фрагментов', True, LOCMEM_CACHE),
+        )
+        self.stdout.write(
+            f'{"вариант":<44} {"загрузка, мс":>12} {"всего, мс":>10}'
+        )
+        results = []
+        for title, cached, caches in variants:
+            with override_settings(CACHES=caches):
+                loading, total = self.measure(
+                    make_engine(cached), context, options['repeat']
+                )
+            results.append(total)
+            self.stdout.write(f'{title:<44} {loading:>12.2f} {total:>10.2f}')
+        before, after = results
+        self.stdout.write(f'Ускорение отрисовки: {before / after:.2f}x')
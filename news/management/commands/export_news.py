@@ -0,0 +1,80 @@
+import csv
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from news.models import News
+
+from .import_news import FORMATS, detect_format
+
+FIELDS = ('title', 'text', 'date')
+
+
+def write_jsonl(file, rows):
+    total = 0
+    for title, text, news_date in rows:
+        file.write(json.dumps(
+            {'title': title, 'text': text, 'date': news_date.isoformat()},
+            ensure_ascii=False
+        ))
+        file.write('\n')
+        total += 1
+    return total
+
+
+def write_csv(file, rows):
+    writer = csv.writer(file)
+    writer.writerow(FIELDS)
+    total = 0
+    for title, text, news_date in rows:
+        writer.writerow((title, text, news_date.isoformat()))
+        total += 1
+    return total
+
+
+WRITERS = {'jsonl': write_jsonl, 'csv': write_csv}
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоковая выгрузка новостей в JSON Lines или CSV. '
+        'Строки читаются из базы порциями, без загрузки всей таблицы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл или «-» для stdout.')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько строк читать из базы за один раз.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if path == '-':
+            format_name = options['format'] or 'jsonl'
+        else:
+            format_name = detect_format(path, options['format'])
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть положительным.')
+        rows = News.objects.order_by('pk').values_list(*FIELDS).iterator(
+            chunk_size=options['batch_size']
+        )
+        file = (
+            sys.stdout if path == '-'
+            else open(path, 'w', encoding='utf-8', newline='')
+        )
+        started = time.perf_counter()
+        try:
+            total = WRITERS[format_name](file, rows)
+        finally:
+            if file is not sys.stdout:
+                file.close()
+        seconds = time.perf_counter() - started
+        # Отчёт в stderr: stdout может быть занят самой выгрузкой.
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено новостей: {total} за {seconds:.2f} с '
+            f'({total / seconds if seconds else 0:.0f} строк/с).'
+        ))
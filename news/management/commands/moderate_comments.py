@@ -0,0 +1,94 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import reset_queries
+
+from news.models import Comment
+from news.moderation import Moderator, pending_batch, save_verdicts
+from news.routers import pin_primary
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет комментарии на проверке пачками: проверки текста '
+        'в пуле процессов, поиск рассылок по всей очереди. Сообщает '
+        'пропускную способность.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.COMMENT_MODERATION_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--workers', type=int, default=(os.cpu_count() or 1) - 1,
+            help=(
+                'Процессов в пуле; 0 — проверять в этом процессе. '
+                'По умолчанию одно ядро остаётся этому процессу.'
+            )
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разобрать очередь и завершиться, не дожидаясь новых.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Пауза перед новой проверкой пустой очереди, секунды.'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['workers'] < 0:
+            raise CommandError(
+                '--batch-size должен быть положительным, --workers — '
+                'неотрицательным.'
+            )
+        workers = options['workers']
+        # Процессы пула настраивают Django сами: при запуске через spawn
+        # они не наследуют состояние этого процесса.
+        pool = ProcessPoolExecutor(
+            workers, initializer=django.setup
+        ) if workers else nullcontext()
+        # Очередь и лента читаются из основной базы: отстающая реплика
+        # вернула бы уже проверенные комментарии и старую ленту.
+        with pool as executor, pin_primary():
+            self.run(Moderator(executor, workers or 1), options)
+
+    def run(self, moderator, options):
+        total = rejected = 0
+        busy = 0.0
+        try:
+            while True:
+                started = time.perf_counter()
+                rows = pending_batch(options['batch_size'])
+                if not rows:
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+                    continue
+                verdicts = moderator.moderate(rows)
+                save_verdicts(verdicts)
+                reset_queries()
+                seconds = time.perf_counter() - started
+                busy += seconds
+                total += len(verdicts)
+                rejected += sum(
+                    verdict.status == Comment.Status.REJECTED
+                    for verdict in verdicts
+                )
+                if options['verbosity'] > 1:
+                    self.stdout.write(
+                        f'Пачка из {len(verdicts)}: '
+                        f'{len(verdicts) / seconds:.0f} в секунду'
+                    )
+        except KeyboardInterrupt:
+            pass
+        rate = total / busy if busy else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено {total}, отклонено {rejected} за {busy:.2f} с '
+            f'работы: {rate:.0f} комментариев в секунду.'
+        ))
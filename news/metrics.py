@@ -0,0 +1,107 @@
+"""
+Метрики запросов: гистограммы по представлениям в формате Prometheus.
+
+Гистограммы накопительные, как принято в Prometheus: скорость
+и перцентили за окно считает сам Prometheus по разнице значений.
+
+Гистограммы живут в памяти процесса: каждый процесс сервера отдаёт
+на /metrics/ только свои запросы. Поэтому у всех рядов есть метка
+worker с номером процесса, и ряды разных процессов не смешиваются;
+общую картину даёт сумма по метке в Prometheus, например
+sum without (worker) (rate(yanews_request_duration_seconds_count[5m])).
+"""
+import os
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+SECONDS_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5
+)
+QUERIES_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+METRICS = (
+    # Имя, описание, границы корзин.
+    (
+        'yanews_request_duration_seconds',
+        'Время обработки запроса.', SECONDS_BUCKETS
+    ),
+    (
+        'yanews_db_duration_seconds',
+        'Время SQL-запросов за один запрос.', SECONDS_BUCKETS
+    ),
+    (
+        'yanews_render_duration_seconds',
+        'Время отрисовки шаблона.', SECONDS_BUCKETS
+    ),
+    (
+        'yanews_db_queries',
+        'Число SQL-запросов за один запрос.', QUERIES_BUCKETS
+    ),
+)
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Пары (граница, число значений не больше неё), как в Prometheus."""
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield bound, total
+
+
+class Registry:
+    """Гистограммы всех метрик по именам представлений."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.histograms = {
+            name: defaultdict(lambda buckets=buckets: Histogram(buckets))
+            for name, _, buckets in METRICS
+        }
+
+    def observe(self, view_name, **values):
+        with self.lock:
+            for name, value in values.items():
+                self.histograms[f'yanews_{name}'][view_name].observe(value)
+
+    def render(self):
+        """Текстовый формат экспозиции Prometheus."""
+        lines = []
+        # Номер процесса берётся при выдаче: после fork он уже другой.
+        worker = os.getpid()
+        with self.lock:
+            for name, description, _ in METRICS:
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} histogram')
+                for view_name, histogram in sorted(
+                    self.histograms[name].items()
+                ):
+                    label = f'view="{view_name}",worker="{worker}"'
+                    for bound, total in histogram.cumulative():
+                        lines.append(
+                            f'{name}_bucket{{{label},le="{bound}"}} {total}'
+                        )
+                    lines.append(f'{name}_sum{{{label}}} {histogram.sum}')
+                    lines.append(
+                        f'{name}_count{{{label}}} {histogram.count}'
+                    )
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
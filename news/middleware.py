@@ -0,0 +1,143 @@
+import asyncio
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.db import connections
+from django.utils.functional import SimpleLazyObject
+
+from .cache import get_cached_user
+from .metrics import registry
+from .routers import pin_primary
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class QueryTimer:
+    """Обёртка выполнения SQL: считает запросы и их суммарное время."""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.queries += 1
+
+
+class RequestMetricsMiddleware:
+    """
+    Замеряет запросы к базе, время в базе и время отрисовки шаблона.
+
+    Результат добавляется в заголовок Server-Timing и в гистограммы
+    по имени представления. Подключается первым в MIDDLEWARE: тогда
+    время отрисовки шаблона замеряется сразу перед самой отрисовкой.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        request.render_seconds = 0.0
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+        match = request.resolver_match
+        registry.observe(
+            match.view_name if match else 'unresolved',
+            request_duration_seconds=total,
+            db_duration_seconds=timer.seconds,
+            render_duration_seconds=request.render_seconds,
+            db_queries=timer.queries,
+        )
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={timer.seconds * 1000:.2f};desc="{timer.queries} SQL"',
+            f'render;dur={request.render_seconds * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ))
+        return response
+
+    def process_template_response(self, request, response):
+        started = time.perf_counter()
+
+        def rendered(response):
+            request.render_seconds = time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+class PrimaryPinMiddleware:
+    """
+    Закрепляет чтение за основной базой после записи.
+
+    Запрос, меняющий данные, читает из основной базы и ставит cookie
+    на NEWS_PRIMARY_PIN_SECONDS секунд. Пока cookie действует, запросы
+    этого пользователя тоже читают из основной базы и видят его запись,
+    даже если реплика отстаёт.
+
+    Работает и в синхронной, и в асинхронной цепочке: под ASGI Django
+    не переводит в общий синхронный поток всё, что ниже, включая
+    асинхронные представления.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Как в MiddlewareMixin: экземпляр — корутинная функция.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not self.pins(request):
+            return self.get_response(request)
+        with pin_primary():
+            response = self.get_response(request)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        if not self.pins(request):
+            return await self.get_response(request)
+        with pin_primary():
+            response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def pins(self, request):
+        return (
+            request.method not in SAFE_METHODS
+            or settings.NEWS_PRIMARY_PIN_COOKIE in request.COOKIES
+        )
+
+    def process_response(self, request, response):
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(
+                settings.NEWS_PRIMARY_PIN_COOKIE, '1',
+                max_age=settings.NEWS_PRIMARY_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+
+class CachedUserMiddleware(AuthenticationMiddleware):
+    """
+    AuthenticationMiddleware с пользователем из кеша.
+
+    request.user по-прежнему ленивый: сессия и пользователь читаются
+    только при первом обращении, см. news.cache.get_cached_user.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
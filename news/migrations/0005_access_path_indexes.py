@@ -0,0 +1,23 @@
+# Generated by Django 3.2.15 on 2026-10-18 04:01
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_news_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='news',
+            name='date',
+            field=models.DateField(db_index=True, default=datetime.datetime.today),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['author', 'id'], name='comment_author_id_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.2.15 on 2026-10-18 05:10
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+BATCH_SIZE = 1000
+
+
+def fill_excerpts(apps, schema_editor):
+    # Копия news.models.make_excerpt: миграция не должна зависеть
+    # от будущих изменений модели.
+    News = apps.get_model('news', 'News')
+    batch = []
+    for news in News.objects.only('pk', 'text').iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        excerpt = Truncator(news.text).words(15, truncate=' …')
+        news.excerpt = Truncator(excerpt).chars(300)
+        batch.append(news)
+        if len(batch) == BATCH_SIZE:
+            News.objects.bulk_update(batch, ('excerpt',))
+            batch = []
+    News.objects.bulk_update(batch, ('excerpt',))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,137 @@
+from django.db import migrations
+
+# Триггеры вызывают news_stem, которая регистрируется в каждом
+# соединении (news.signals.register_search_functions). Миграции,
+# пересоздающие таблицы news_news и news_comment в SQLite, удаляют
+# триггеры: после них эту миграцию нужно повторить.
+SQLITE_FORWARD = (
+    '''
+    CREATE VIRTUAL TABLE news_search USING fts5(
+        kind UNINDEXED, object_id UNINDEXED, news_id UNINDEXED, title, body,
+        tokenize = 'unicode61 remove_diacritics 0'
+    )
+    ''',
+    '''
+    CREATE TRIGGER news_search_news_insert AFTER INSERT ON news_news BEGIN
+        INSERT INTO news_search(rowid, kind, object_id, news_id, title, body)
+        VALUES (
+            NEW.id * 2, 'news', NEW.id, NEW.id,
+            news_stem(NEW.title), news_stem(NEW.text)
+        );
+    END
+    ''',
+    '''
+    CREATE TRIGGER news_search_news_update AFTER UPDATE OF title, text
+    ON news_news BEGIN
+        DELETE FROM news_search WHERE rowid = OLD.id * 2;
+        INSERT INTO news_search(rowid, kind, object_id, news_id, title, body)
+        VALUES (
+            NEW.id * 2, 'news', NEW.id, NEW.id,
+            news_stem(NEW.title), news_stem(NEW.text)
+        );
+    END
+    ''',
+    '''
+    CREATE TRIGGER news_search_news_delete AFTER DELETE ON news_news BEGIN
+        DELETE FROM news_search WHERE rowid = OLD.id * 2;
+    END
+    ''',
+    '''
+    CREATE TRIGGER news_search_comment_insert AFTER INSERT ON news_comment
+    BEGIN
+        INSERT INTO news_search(rowid, kind, object_id, news_id, title, body)
+        VALUES (
+            NEW.id * 2 + 1, 'comment', NEW.id, NEW.news_id, '',
+            news_stem(NEW.text)
+        );
+    END
+    ''',
+    '''
+    CREATE TRIGGER news_search_comment_update AFTER UPDATE OF text, news_id
+    ON news_comment BEGIN
+        DELETE FROM news_search WHERE rowid = OLD.id * 2 + 1;
+        INSERT INTO news_search(rowid, kind, object_id, news_id, title, body)
+        VALUES (
+            NEW.id * 2 + 1, 'comment', NEW.id, NEW.news_id, '',
+            news_stem(NEW.text)
+        );
+    END
+    ''',
+    '''
+    CREATE TRIGGER news_search_comment_delete AFTER DELETE ON news_comment
+    BEGIN
+        DELETE FROM news_search WHERE rowid = OLD.id * 2 + 1;
+    END
+    ''',
+    '''
+    INSERT INTO news_search(rowid, kind, object_id, news_id, title, body)
+    SELECT id * 2, 'news', id, id, news_stem(title), news_stem(text)
+    FROM news_news
+    ''',
+    '''
+    INSERT INTO news_search(rowid, kind, object_id, news_id, title, body)
+    SELECT id * 2 + 1, 'comment', id, news_id, '', news_stem(text)
+    FROM news_comment
+    ''',
+)
+
+SQLITE_BACKWARD = (
+    'DROP TRIGGER news_search_news_insert',
+    'DROP TRIGGER news_search_news_update',
+    'DROP TRIGGER news_search_news_delete',
+    'DROP TRIGGER news_search_comment_insert',
+    'DROP TRIGGER news_search_comment_update',
+    'DROP TRIGGER news_search_comment_delete',
+    'DROP TABLE news_search',
+)
+
+POSTGRESQL_FORWARD = (
+    '''
+    ALTER TABLE news_news ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('russian', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('russian', coalesce(text, '')), 'B')
+    ) STORED
+    ''',
+    '''
+    CREATE INDEX news_news_search_idx ON news_news
+    USING GIN (search_vector)
+    ''',
+    '''
+    ALTER TABLE news_comment ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('russian', coalesce(text, ''))) STORED
+    ''',
+    '''
+    CREATE INDEX news_comment_search_idx ON news_comment
+    USING GIN (search_vector)
+    ''',
+)
+
+POSTGRESQL_BACKWARD = (
+    'ALTER TABLE news_news DROP COLUMN search_vector',
+    'ALTER TABLE news_comment DROP COLUMN search_vector',
+)
+
+STATEMENTS = {
+    'sqlite': (SQLITE_FORWARD, SQLITE_BACKWARD),
+    'postgresql': (POSTGRESQL_FORWARD, POSTGRESQL_BACKWARD),
+}
+
+
+def run(direction):
+    def operation(apps, schema_editor):
+        statements = STATEMENTS.get(schema_editor.connection.vendor)
+        for sql in statements[direction] if statements else ():
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_news_excerpt'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(0), run(1)),
+    ]
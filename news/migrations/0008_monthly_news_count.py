@@ -0,0 +1,43 @@
+# Generated by Django 3.2.15 on 2026-10-18 04:56
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def fill_counts(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    MonthlyNewsCount = apps.get_model('news', 'MonthlyNewsCount')
+    counts = News.objects.order_by().annotate(
+        year=ExtractYear('date'), month=ExtractMonth('date')
+    ).values('year', 'month').annotate(count=Count('pk'))
+    MonthlyNewsCount.objects.bulk_create(
+        MonthlyNewsCount(**row) for row in counts
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0007_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyNewsCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('count', models.PositiveIntegerField()),
+            ],
+            options={
+                'ordering': ('-year', '-month'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='monthlynewscount',
+            constraint=models.UniqueConstraint(fields=('year', 'month'), name='monthly_news_count_unique'),
+        ),
+        migrations.RunPython(fill_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.2.15 on 2026-10-18 05:08
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+# AddField в SQLite пересоздаёт таблицу news_comment, и вместе со старой
+# таблицей удаляются триггеры поискового индекса: они создаются заново.
+search = import_module('news.migrations.0007_search')
+COMMENT_TRIGGERS = tuple(
+    sql for sql in search.SQLITE_FORWARD
+    if 'CREATE TRIGGER' in sql and 'ON news_comment' in sql
+)
+
+
+def restore_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in COMMENT_TRIGGERS:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0008_monthly_news_count'),
+    ]
+
+    operations = [
+        # При откате поля удаляются последними и тоже пересоздают таблицу.
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.AddField(
+            model_name='comment',
+            name='moderation_reason',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='status',
+            field=models.CharField(choices=[('published', 'Опубликован'), ('pending', 'На проверке'), ('rejected', 'Отклонён')], default='published', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['id'], name='comment_pending_idx'),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
@@ -1,13 +1,27 @@
-from datetime import datetime
+from datetime import date, datetime
 
 from django.conf import settings
 from django.db import models
+from django.utils.text import Truncator
+
+EXCERPT_WORDS = 15
+EXCERPT_MAX_LENGTH = 300
+
+
+def make_excerpt(text):
+    """Начало текста новости для главной страницы."""
+    excerpt = Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+    return Truncator(excerpt).chars(EXCERPT_MAX_LENGTH)
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
-    date = models.DateField(default=datetime.today)
+    excerpt = models.CharField(
+        max_length=EXCERPT_MAX_LENGTH, blank=True, editable=False
+    )
+    date = models.DateField(default=datetime.today, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ('-date',)
@@ -18,7 +32,28 @@ class News(models.Model):
         return self.title
 
 
+class CommentQuerySet(models.QuerySet):
+
+    def published(self):
+        return self.filter(status=Comment.Status.PUBLISHED)
+
+    def visible_to(self, user_id=None):
+        """Опубликованные комментарии и любые комментарии самого автора."""
+        if user_id is None:
+            return self.published()
+        return self.filter(
+            models.Q(status=Comment.Status.PUBLISHED)
+            | models.Q(author_id=user_id)
+        )
+
+
 class Comment(models.Model):
+
+    class Status(models.TextChoices):
+        PUBLISHED = 'published', 'Опубликован'
+        PENDING = 'pending', 'На проверке'
+        REJECTED = 'rejected', 'Отклонён'
+
     news = models.ForeignKey(
         News,
         on_delete=models.CASCADE
@@ -29,9 +64,58 @@ class Comment(models.Model):
     )
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PUBLISHED
+    )
+    moderation_reason = models.CharField(max_length=200, blank=True)
+
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='comment_news_created_idx'
+            ),
+            models.Index(
+                fields=('author', 'id'),
+                name='comment_author_id_idx'
+            ),
+            # Очередь модерации: только комментарии на проверке.
+            models.Index(
+                fields=('id',),
+                condition=models.Q(status='pending'),
+                name='comment_pending_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+
+class MonthlyNewsCount(models.Model):
+    """
+    Число новостей за месяц.
+
+    Архив показывает месяцы и их размер без подсчёта новостей
+    при каждом запросе. Таблицу поддерживает news.archive.
+    """
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ('-year', '-month')
+        constraints = (
+            models.UniqueConstraint(
+                fields=('year', 'month'), name='monthly_news_count_unique'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.month:02}.{self.year}: {self.count}'
+
+    @property
+    def first_day(self):
+        return date(self.year, self.month, 1)
@@ -0,0 +1,260 @@
+"""
+Модерация комментариев.
+
+Быстрые проверки (COMMENT_INLINE_CHECKS) выполняются в форме, прямо
+в запросе: комментарий, который их не прошёл, не сохраняется. Дорогие
+проверки (COMMENT_MODERATION_CHECKS) выполняются вне запроса. При
+включённой настройке COMMENT_MODERATION комментарий сохраняется
+со статусом «на проверке» и виден только автору, пока его не проверит
+команда moderate_comments. Очередь — сами комментарии на проверке:
+их читает частичный индекс comment_pending_idx.
+
+Проверка — функция, которая получает текст и возвращает причину отказа
+или None. Проверки текста выполняются пачками в пуле процессов
+concurrent.futures; повтор одного текста разными авторами ищется
+по отпечаткам текстов в процессе команды, за окно в несколько минут.
+"""
+import hashlib
+import re
+from collections import Counter, defaultdict, deque, namedtuple
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils.module_loading import import_string
+
+from .models import Comment
+from .profanity import FileBadWordsMatcher, normalize
+
+BAD_WORDS = (
+    'редиска',
+    'негодяй',
+    # Дополните список на своё усмотрение.
+)
+WARNING = 'Не ругайтесь!'
+TOO_MANY_LINKS = 'Слишком много ссылок.'
+REPEATED_TEXT = 'Текст из повторов.'
+FLOOD = 'Такой же текст только что прислали другие пользователи.'
+
+WORD = re.compile(r'\w+')
+LINK = re.compile(r'https?://|www\.', re.IGNORECASE)
+# Короткий фрагмент, повторённый подряд десять раз и больше. Ищется
+# только в длинных словах: по всему тексту поиск с возвратами дорог,
+# а повторы целых слов находит проверка фрагментов.
+REPEATED_RUN = re.compile(r'(.{1,10}?)\1{9,}')
+LONG_WORD = 20
+# Длина фрагмента текста в словах для поиска повторов.
+SHINGLE = 3
+
+bad_words = FileBadWordsMatcher(settings.BAD_WORDS_FILE, BAD_WORDS)
+
+# Отправляется после сохранения решений по пачке комментариев.
+comments_moderated = Signal()
+
+# text — проверенный текст: решение не относится к изменённому комментарию.
+Verdict = namedtuple(
+    'Verdict', ('id', 'news_id', 'text', 'status', 'reason')
+)
+
+
+def limit(name):
+    return settings.COMMENT_MODERATION_LIMITS[name]
+
+
+def check_bad_words(text):
+    return WARNING if bad_words.search(text) else None
+
+
+def check_links(text):
+    if len(LINK.findall(text)) > limit('links'):
+        return TOO_MANY_LINKS
+    return None
+
+
+def check_repeated_text(text):
+    """
+    Текст, большую часть которого занимают повторы.
+
+    Доля неповторяющихся фрагментов по SHINGLE слов мала у текста,
+    скопированного несколько раз подряд, даже если между копиями
+    есть другие слова.
+    """
+    words = WORD.findall(text.lower())
+    if any(
+        REPEATED_RUN.search(word) for word in words if len(word) >= LONG_WORD
+    ):
+        return REPEATED_TEXT
+    if len(words) < limit('repeated_min_words'):
+        return None
+    shingles = [
+        tuple(words[index:index + SHINGLE])
+        for index in range(len(words) - SHINGLE + 1)
+    ]
+    if len(set(shingles)) / len(shingles) < limit('unique_shingles_ratio'):
+        return REPEATED_TEXT
+    return None
+
+
+def fingerprint(text):
+    """
+    Отпечаток текста без учёта регистра, знаков и похожих букв.
+
+    У коротких текстов отпечатка нет: «Спасибо!» от многих
+    пользователей — не рассылка.
+    """
+    words = WORD.findall(normalize(text))
+    if len(words) < limit('flood_min_words'):
+        return None
+    return hashlib.blake2b(' '.join(words).encode(), digest_size=16).digest()
+
+
+@lru_cache(maxsize=None)
+def load_checks(paths):
+    return tuple(import_string(path) for path in paths)
+
+
+def run_checks(paths, text):
+    for check in load_checks(tuple(paths)):
+        reason = check(text)
+        if reason:
+            return reason
+    return None
+
+
+def check_inline(text):
+    """Причина отказа по быстрым проверкам или None."""
+    return run_checks(settings.COMMENT_INLINE_CHECKS, text)
+
+
+def analyse(text):
+    """
+    Дорогие проверки одного текста и его отпечаток.
+
+    Выполняется в процессе пула, поэтому получает и возвращает
+    только простые значения.
+    """
+    return run_checks(settings.COMMENT_MODERATION_CHECKS, text), (
+        fingerprint(text)
+    )
+
+
+def initial_status():
+    """Статус нового или изменённого комментария."""
+    if settings.COMMENT_MODERATION:
+        return Comment.Status.PENDING
+    return Comment.Status.PUBLISHED
+
+
+class FloodWindow:
+    """
+    Отпечатки текстов и их авторы за последние seconds секунд.
+
+    Текст считается рассылкой, когда его прислали authors разных
+    пользователей. Окно живёт в памяти процесса модерации.
+    """
+
+    def __init__(self, seconds, authors):
+        self.period = timedelta(seconds=seconds)
+        self.authors = authors
+        self.entries = deque()
+        self.counts = defaultdict(Counter)
+
+    def expire(self, now):
+        while self.entries and self.entries[0][0] < now - self.period:
+            _, key, author_id = self.entries.popleft()
+            authors = self.counts[key]
+            authors[author_id] -= 1
+            if not authors[author_id]:
+                del authors[author_id]
+            if not authors:
+                del self.counts[key]
+
+    def add(self, created, key, author_id):
+        """Добавляет текст; возвращает True, если это рассылка."""
+        self.expire(created)
+        self.entries.append((created, key, author_id))
+        authors = self.counts[key]
+        authors[author_id] += 1
+        return len(authors) >= self.authors
+
+
+class Moderator:
+    """
+    Решения по пачке комментариев на проверке.
+
+    Проверки текста выполняются в executor (пул процессов), без него —
+    в текущем процессе. Проверка на рассылку идёт после них, по порядку
+    комментариев.
+    """
+
+    def __init__(self, executor=None, workers=1):
+        self.executor = executor
+        self.workers = workers
+        self.window = FloodWindow(
+            limit('flood_window'), limit('flood_authors')
+        )
+
+    def analyse(self, texts):
+        if self.executor is None:
+            return map(analyse, texts)
+        chunksize = max(1, len(texts) // (self.workers * 4))
+        return self.executor.map(analyse, texts, chunksize=chunksize)
+
+    def moderate(self, rows):
+        """Строки с id, news_id, author_id, text и created — в решения."""
+        verdicts = []
+        results = self.analyse([row['text'] for row in rows])
+        for row, (reason, key) in zip(rows, results):
+            if key is not None and self.window.add(
+                row['created'], key, row['author_id']
+            ):
+                reason = reason or FLOOD
+            status = (
+                Comment.Status.REJECTED if reason
+                else Comment.Status.PUBLISHED
+            )
+            verdicts.append(Verdict(
+                row['id'], row['news_id'], row['text'], status, reason or ''
+            ))
+        return verdicts
+
+
+def pending_batch(size):
+    """Самые старые комментарии на проверке, по частичному индексу."""
+    return list(
+        Comment.objects.filter(status=Comment.Status.PENDING).order_by(
+            'pk'
+        ).values('id', 'news_id', 'author_id', 'text', 'created')[:size]
+    )
+
+
+def save_verdicts(verdicts):
+    """
+    Сохраняет решения: один UPDATE на каждую пару статуса и причины.
+
+    Решение сохраняется, только если текст комментария не изменился
+    после проверки. Изменённый во время проверки комментарий остаётся
+    в очереди, и его новый текст проверяется следующей пачкой. Правка
+    не проходит между сверкой текста и UPDATE: строки заблокированы
+    до конца транзакции, а в SQLite транзакция, читавшая до чужой
+    записи, не может писать и завершается ошибкой.
+    """
+    groups = defaultdict(list)
+    with transaction.atomic():
+        texts = dict(Comment.objects.select_for_update().filter(
+            pk__in=[verdict.id for verdict in verdicts],
+            status=Comment.Status.PENDING,
+        ).values_list('pk', 'text'))
+        for verdict in verdicts:
+            if texts.get(verdict.id) == verdict.text:
+                groups[verdict.status, verdict.reason].append(verdict.id)
+        for (status, reason), ids in groups.items():
+            Comment.objects.filter(
+                pk__in=ids, status=Comment.Status.PENDING
+            ).update(status=status, moderation_reason=reason)
+    comments_moderated.send(
+        sender=Comment,
+        news_ids=sorted({verdict.news_id for verdict in verdicts})
+    )
@@ -0,0 +1,82 @@
+"""
+Курсорная пагинация комментариев.
+
+Страница определяется парой (created, id) последнего показанного
+комментария, поэтому каждая следующая страница читается по индексу
+с того же места, без OFFSET и без пересчёта предыдущих строк.
+"""
+import base64
+import binascii
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+CURSOR_SEPARATOR = '|'
+# Наибольший ключ, который помещается в целочисленный столбец базы.
+MAX_PK = 2 ** 63 - 1
+
+
+def make_cursor(value, pk):
+    """Курсор на позицию сразу после строки с ключом (value, pk)."""
+    raw = f'{value.isoformat()}{CURSOR_SEPARATOR}{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Разбирает курсор в пару (created, id).
+
+    Для повреждённого курсора и ключа, который не поместится
+    в запрос к базе, выбрасывает ValueError.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created, pk = raw.split(CURSOR_SEPARATOR)
+        created, pk = datetime.fromisoformat(created), int(pk)
+        if not 0 <= pk <= MAX_PK:
+            raise ValueError(f'Ключ вне диапазона: {pk}')
+        return created, pk
+    except (binascii.Error, UnicodeError, ValueError) as error:
+        raise ValueError(f'Некорректный курсор: {cursor!r}') from error
+
+
+def after_cursor(queryset, field, cursor=None, descending=False):
+    """
+    Строки, упорядоченные по (field, pk), начиная сразу после курсора.
+
+    Для повреждённого курсора выбрасывает ValueError.
+    """
+    prefix, lookup = ('-', 'lt') if descending else ('', 'gt')
+    queryset = queryset.order_by(f'{prefix}{field}', f'{prefix}pk')
+    if cursor:
+        value, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f'{field}__{lookup}': value})
+            | Q(**{field: value, f'pk__{lookup}': pk})
+        )
+    return queryset
+
+
+def comments_page(queryset, cursor=None, size=None):
+    """
+    Одна страница комментариев и курсор следующей страницы.
+
+    Комментарии — строки values() с полями created и id. Если следующей
+    страницы нет, вместо курсора возвращается None.
+    """
+    size = size or settings.COMMENTS_COUNT_ON_PAGE
+    return rows_page(queryset, 'created', size, cursor)
+
+
+def rows_page(queryset, field, size, cursor=None, descending=False):
+    """
+    Страница строк values() и курсор следующей страницы.
+
+    Строки должны содержать поле field и первичный ключ id.
+    """
+    rows = list(after_cursor(queryset, field, cursor, descending)[:size + 1])
+    if len(rows) > size:
+        rows = rows[:size]
+        return rows, make_cursor(rows[-1][field], rows[-1]['id'])
+    return rows, None
@@ -0,0 +1,141 @@
+"""
+Поиск запрещённых слов в комментариях.
+
+Список слов собирается в одно регулярное выражение в виде префиксного
+дерева: текст просматривается один раз, сколько бы слов ни было
+в списке. Латинские буквы и цифры, похожие на кириллические, и «ё»
+приводятся к одному написанию и в словах, и в тексте.
+"""
+import os
+import re
+import threading
+
+HOMOGLYPHS = str.maketrans({
+    'a': 'а',
+    'b': 'в',
+    'c': 'с',
+    'e': 'е',
+    'h': 'н',
+    'k': 'к',
+    'm': 'м',
+    'o': 'о',
+    'p': 'р',
+    't': 'т',
+    'x': 'х',
+    'y': 'у',
+    'ё': 'е',
+    '0': 'о',
+    '3': 'з',
+})
+HOMOGLYPH_REGEX = re.compile(
+    '[' + ''.join(chr(code) for code in HOMOGLYPHS) + ']'
+)
+
+
+def normalize(text):
+    """
+    Нижний регистр и кириллица вместо похожих латинских букв.
+
+    Перекодирование посимвольно и заметно дороже поиска, поэтому
+    текст без подозрительных символов возвращается как есть.
+    """
+    text = text.lower()
+    if HOMOGLYPH_REGEX.search(text):
+        return text.translate(HOMOGLYPHS)
+    return text
+
+
+def trie_pattern(words):
+    """
+    Регулярное выражение, совпадающее с любым из слов.
+
+    Общие префиксы слов выносятся за скобки, поэтому движок проверяет
+    каждую позицию текста за время, зависящее от длины слова,
+    а не от размера списка.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [
+            re.escape(char) + build(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ''
+        if all(len(branch) == 1 for branch in branches):
+            group = (
+                branches[0] if len(branches) == 1
+                else '[' + ''.join(branches) + ']'
+            )
+        elif len(branches) == 1 and '' not in node:
+            group = branches[0]
+        else:
+            group = '(?:' + '|'.join(branches) + ')'
+        # Слово может закончиться на этом узле: остаток необязателен.
+        return group + '?' if '' in node else group
+
+    return build(trie)
+
+
+class BadWordsMatcher:
+    """Скомпилированный набор запрещённых слов."""
+
+    def __init__(self, words):
+        self.words = frozenset(
+            normalize(word.strip()) for word in words if word.strip()
+        )
+        self.regex = (
+            re.compile(trie_pattern(self.words)) if self.words else None
+        )
+
+    def search(self, text):
+        """Первое найденное запрещённое слово или None."""
+        if self.regex is None:
+            return None
+        match = self.regex.search(normalize(text))
+        return match.group() if match else None
+
+
+def read_words(path):
+    """Слова из файла: по одному в строке, «#» начинает комментарий."""
+    with open(path, encoding='utf-8') as file:
+        return [line.split('#', 1)[0].strip() for line in file]
+
+
+class FileBadWordsMatcher:
+    """
+    Набор запрещённых слов из файла, перечитываемый при его изменении.
+
+    Перед каждой проверкой сравнивается время изменения файла;
+    пересборка происходит только если файл изменился.
+    """
+
+    def __init__(self, path, extra_words=()):
+        self.path = path
+        self.extra_words = tuple(extra_words)
+        self.mtime = None
+        self.matcher = BadWordsMatcher(self.extra_words)
+        self.lock = threading.Lock()
+
+    def current(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except (OSError, TypeError):
+            mtime = None
+        if mtime != self.mtime:
+            with self.lock:
+                if mtime != self.mtime:
+                    words = read_words(self.path) if mtime else []
+                    self.matcher = BadWordsMatcher(
+                        self.extra_words + tuple(words)
+                    )
+                    self.mtime = mtime
+        return self.matcher
+
+    def search(self, text):
+        return self.current().search(text)
@@ -0,0 +1,106 @@
+import gzip
+import json
+from datetime import datetime
+from http.client import BAD_REQUEST, NOT_FOUND, OK
+
+import pytest
+
+from django.urls import reverse
+
+from news.models import News
+from news.pagination import make_cursor
+
+pytestmark = pytest.mark.django_db
+
+
+def fetch_all(client, url, **params):
+    """Все страницы списка по курсорам next."""
+    rows, after = [], None
+    while True:
+        if after:
+            params['after'] = after
+        response = client.get(url, params)
+        assert response.status_code == OK
+        data = response.json()
+        rows += data['results']
+        after = data['next']
+        if after is None:
+            return rows
+
+
+def test_news_list_pages(client, all_news, settings):
+    """Страницы по курсору отдают все новости от новых к старым."""
+    settings.NEWS_API_PAGE_SIZE = 4
+    rows = fetch_all(client, reverse('news:api_news'))
+    expected = list(
+        News.objects.order_by('-date', '-pk').values_list('pk', flat=True)
+    )
+    assert [row['id'] for row in rows] == expected
+    assert set(rows[0]) == {
+        'id', 'title', 'excerpt', 'date', 'comment_count'
+    }
+
+
+def test_sparse_fieldset(client, news, comments):
+    """В ответе только запрошенные поля, даже если по ним идёт пагинация."""
+    response = client.get(
+        reverse('news:api_news'), {'fields': 'title,comment_count'}
+    )
+    assert response.json()['results'] == [
+        {'title': news.title, 'comment_count': 2}
+    ]
+
+
+def test_unknown_field(client, news):
+    response = client.get(reverse('news:api_news'), {'fields': 'title,x'})
+    assert response.status_code == BAD_REQUEST
+    assert 'x' in response.json()['error']
+
+
+def test_broken_cursor(client, news):
+    response = client.get(reverse('news:api_news'), {'after': 'xxx'})
+    assert response.status_code == BAD_REQUEST
+
+
+def test_cursor_pk_out_of_range(client, news):
+    after = make_cursor(datetime.now(), 10 ** 30)
+    response = client.get(
+        reverse('news:api_comments', args=(news.pk,)), {'after': after}
+    )
+    assert response.status_code == BAD_REQUEST
+    response = client.get(
+        reverse('news:comments', args=(news.pk,)), {'after': after}
+    )
+    assert response.status_code == NOT_FOUND
+
+
+def test_news_detail(client, news):
+    response = client.get(
+        reverse('news:api_news_detail', args=(news.pk,)),
+        {'fields': 'id,text'}
+    )
+    assert response.json() == {'id': news.pk, 'text': news.text}
+    response = client.get(reverse('news:api_news_detail', args=(0,)))
+    assert response.status_code == NOT_FOUND
+
+
+def test_comments_pages(client, news, author, settings):
+    """Комментарии отдаются от старых к новым с именем автора."""
+    settings.COMMENTS_COUNT_ON_PAGE = 2
+    texts = [f'Комментарий {index}' for index in range(5)]
+    for text in texts:
+        news.comment_set.create(author=author, text=text)
+    rows = fetch_all(client, reverse('news:api_comments', args=(news.pk,)))
+    assert [row['text'] for row in rows] == texts
+    assert rows[0]['author_username'] == author.username
+    response = client.get(reverse('news:api_comments', args=(0,)))
+    assert response.status_code == NOT_FOUND
+
+
+def test_gzip(client, all_news):
+    """Ответ сжимается, если клиент это поддерживает."""
+    response = client.get(
+        reverse('news:api_news'), HTTP_ACCEPT_ENCODING='gzip'
+    )
+    assert response['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.content))['results']
@@ -0,0 +1,119 @@
+from datetime import date
+
+import pytest
+
+from django.urls import reverse
+from django.utils import timezone
+
+from news.archive import rebuild_counts
+from news.models import MonthlyNewsCount, News
+
+pytestmark = pytest.mark.django_db
+
+
+def counts():
+    return list(
+        MonthlyNewsCount.objects.values_list('year', 'month', 'count')
+    )
+
+
+def make_news(*dates):
+    return [
+        News.objects.create(title=f'Новость {index}', text='Текст', date=day)
+        for index, day in enumerate(dates)
+    ]
+
+
+def test_counts_follow_changes():
+    """Число новостей за месяц пересчитывается при каждом изменении."""
+    first, second = make_news(date(2020, 1, 5), date(2020, 1, 20))
+    assert counts() == [(2020, 1, 2)]
+    second.date = date(2020, 3, 1)
+    second.save()
+    assert counts() == [(2020, 3, 1), (2020, 1, 1)]
+    first.delete()
+    assert counts() == [(2020, 3, 1)]
+
+
+def test_rebuild_counts_after_bulk_create():
+    """После bulk_create таблица перестраивается целиком."""
+    News.objects.bulk_create(
+        News(title=str(day), text='Текст', date=date(2019, 12, day))
+        for day in range(1, 4)
+    )
+    assert counts() == []
+    rebuild_counts()
+    assert counts() == [(2019, 12, 3)]
+
+
+def test_archive_pages(client):
+    """Годы и месяцы архива ведут к новостям за месяц и за день."""
+    make_news(date(2020, 1, 5), date(2020, 1, 20), date(2021, 2, 1))
+    response = client.get(reverse('news:archive'))
+    assert [
+        (month.year, month.month) for month in response.context['months']
+    ] == [(2021, 2), (2020, 1)]
+    response = client.get(reverse('news:archive_year', args=(2020,)))
+    assert len(response.context['months']) == 1
+    response = client.get(reverse('news:archive_month', args=(2020, 1)))
+    assert [news.date.day for news in response.context['news_list']] == [
+        20, 5
+    ]
+    response = client.get(reverse('news:archive_day', args=(2020, 1, 5)))
+    assert [news.date.day for news in response.context['news_list']] == [5]
+
+
+@pytest.mark.parametrize('args', (
+    (2020, 13), (2020, 2, 30), (1999, 1), (2020, 1, 6)
+))
+def test_missing_period_not_found(client, args):
+    """Несуществующая дата и пустой период — ошибка 404."""
+    make_news(date(2020, 1, 5))
+    name = 'news:archive_day' if len(args) == 3 else 'news:archive_month'
+    assert client.get(reverse(name, args=args)).status_code == 404
+
+
+def test_month_pages_by_cursor(client, settings):
+    """Месяц листается курсором без пропусков и повторов."""
+    settings.NEWS_ARCHIVE_PAGE_SIZE = 2
+    news = make_news(*(date(2020, 1, day) for day in (3, 1, 2, 2, 5)))
+    url = reverse('news:archive_month', args=(2020, 1))
+    seen, cursor = [], None
+    while True:
+        response = client.get(url, {'after': cursor} if cursor else {})
+        seen += [item.pk for item in response.context['news_list']]
+        cursor = response.context['next_cursor']
+        if cursor is None:
+            break
+    expected = sorted(news, key=lambda item: (item.date, item.pk))[::-1]
+    assert seen == [item.pk for item in expected]
+
+
+def test_sitemap_sections(client, settings):
+    """Индекс карты сайта делит новости на разделы по первичному ключу."""
+    settings.SITEMAP_SECTION_SIZE = 2
+    news = make_news(*[date(2020, 1, 1)] * 3)
+    response = client.get(reverse('news:sitemap'))
+    assert response.content.decode().count('<sitemap>') == 2
+    section = (news[-1].pk - 1) // 2
+    response = client.get(reverse('news:sitemap_section', args=(section,)))
+    content = b''.join(response.streaming_content).decode()
+    assert reverse('news:detail', args=(news[-1].pk,)) in content
+    assert f'<lastmod>{timezone.now().date()}</lastmod>' in content
+    assert content.endswith('</urlset>\n')
+    response = client.get(reverse('news:sitemap_section', args=(100,)))
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize('last_key', (False, True))
+def test_sitemap_section_out_of_range(client, news, settings, last_key):
+    """
+    Раздел с ключами больше целочисленного столбца базы — 404,
+    в том числе раздел, в который попадает наибольший ключ.
+    """
+    section = (
+        (2 ** 63 - 1) // settings.SITEMAP_SECTION_SIZE if last_key
+        else 10 ** 20
+    )
+    response = client.get(reverse('news:sitemap_section', args=(section,)))
+    assert response.status_code == 404
@@ -0,0 +1,114 @@
+import logging
+from http.client import FOUND, NOT_MODIFIED, OK
+from importlib import reload
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from django.core.handlers.asgi import ASGIHandler
+from django.urls import clear_url_caches
+
+import news.urls
+import yanews.urls
+from news.models import Comment
+from news.routers import PrimaryReplicaRouter
+
+pytestmark = pytest.mark.django_db
+
+
+def reload_urls():
+    reload(news.urls)
+    reload(yanews.urls)
+    clear_url_caches()
+
+
+@pytest.fixture
+def async_views(settings):
+    """Фикстура: маршруты собраны с асинхронными представлениями."""
+    settings.NEWS_ASYNC_VIEWS = True
+    reload_urls()
+    yield
+    settings.NEWS_ASYNC_VIEWS = False
+    reload_urls()
+
+
+def test_async_views_are_selected(async_views, client, detail_url):
+    """Настройка NEWS_ASYNC_VIEWS подключает асинхронные представления."""
+    response = client.get(detail_url)
+    assert response.status_code == OK
+    assert response.resolver_match.func.__name__ == 'news_detail'
+
+
+def test_async_views_under_asgi(async_views, async_client, news, comment):
+    """Асинхронные представления отвечают через ASGI-обработчик."""
+    async def get_home():
+        return await async_client.get('/')
+
+    response = async_to_sync(get_home)()
+    assert response.status_code == OK
+    assert news.title in response.content.decode()
+
+
+def test_cached_page_without_database(
+    async_views, client, news, detail_url, django_assert_num_queries
+):
+    """
+    Повторный запрос анонима и условный запрос
+    обслуживаются из кеша без обращения к базе.
+    """
+    first = client.get(detail_url)
+    with django_assert_num_queries(0):
+        second = client.get(detail_url)
+        not_modified = client.get(
+            detail_url, HTTP_IF_NONE_MATCH=first['ETag']
+        )
+    assert second.content == first.content
+    assert not_modified.status_code == NOT_MODIFIED
+
+
+def test_async_comment_post(
+    async_views, author_client, news, detail_url, form_data
+):
+    """Комментарий через асинхронный маршрут сразу виден на странице."""
+    response = author_client.post(detail_url, data=form_data)
+    assert response.status_code == FOUND
+    assert Comment.objects.filter(news=news).count() == 1
+    response = author_client.get(detail_url)
+    assert form_data['text'] in response.content.decode()
+
+
+def test_middleware_not_adapted_under_asgi(settings, caplog):
+    """
+    Под ASGI ни одно middleware не переводится в синхронный поток,
+    и асинхронные представления остаются в цикле событий.
+    """
+    settings.DEBUG = True
+    with caplog.at_level(logging.DEBUG, logger='django.request'):
+        ASGIHandler()
+    assert not [
+        record.getMessage() for record in caplog.records
+        if 'adapted' in record.getMessage()
+    ]
+
+
+def test_primary_pin_under_asgi(
+    async_views, async_client, settings, news, detail_url, monkeypatch
+):
+    """Cookie закрепления действует и в асинхронной цепочке."""
+    settings.NEWS_REPLICAS = ['replica_1']
+    reads = []
+    db_for_read = PrimaryReplicaRouter.db_for_read
+
+    def record(self, model, **hints):
+        reads.append(db_for_read(self, model, **hints))
+        return 'default'
+
+    monkeypatch.setattr(PrimaryReplicaRouter, 'db_for_read', record)
+    async_client.cookies[settings.NEWS_PRIMARY_PIN_COOKIE] = '1'
+
+    async def get_detail():
+        return await async_client.get(detail_url)
+
+    response = async_to_sync(get_detail)()
+    assert response.status_code == OK
+    assert reads and set(reads) == {'default'}
@@ -0,0 +1,179 @@
+import pytest
+from http.client import NOT_MODIFIED, OK
+
+from django.conf import settings as django_settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.test import Client
+from django.urls import reverse
+
+from news.models import Comment
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(params=('locmem', 'file'))
+def cache_backend(request, settings, tmp_path):
+    """Фикстура: каждый тест кеша проходит на обоих бэкендах."""
+    backend = dict(django_settings.NEWS_CACHE_BACKENDS[request.param])
+    if 'LOCATION' in backend:
+        backend['LOCATION'] = tmp_path
+    settings.CACHES = {'default': backend}
+    yield request.param
+    cache.clear()
+
+
+def test_anonymous_page_served_from_cache(
+    cache_backend, client, news, comment, detail_url,
+    django_assert_num_queries
+):
+    """Повторный запрос анонима не обращается к базе данных."""
+    first = client.get(detail_url)
+    with django_assert_num_queries(0):
+        second = client.get(detail_url)
+    assert second.content == first.content
+
+
+@pytest.mark.parametrize('timeout, cached', ((60, True), (0, False)))
+def test_header_cache_timeout(
+    settings, author_client, author, news, detail_url, timeout, cached
+):
+    """Шапка хранится в кеше фрагментов HEADER_CACHE_TIMEOUT секунд."""
+    settings.HEADER_CACHE_TIMEOUT = timeout
+    key = make_template_fragment_key('header', (author.pk, author.username))
+    cache.delete(key)
+    author_client.get(detail_url)
+    assert (cache.get(key) is not None) is cached
+
+
+def test_new_comment_invalidates_page(
+    cache_backend, client, news, author, detail_url
+):
+    """Новый комментарий сразу виден на закешированной странице."""
+    client.get(detail_url)
+    Comment.objects.create(news=news, author=author, text='Свежий')
+    response = client.get(detail_url)
+    assert 'Свежий' in response.content.decode()
+
+
+def test_deleted_comment_invalidates_home(
+    cache_backend, client, news, comment, django_assert_num_queries
+):
+    """
+    Удаление комментария сбрасывает кеш главной страницы,
+    а готовая лента уже обновлена сигналом.
+    """
+    client.get('/')
+    comment.delete()
+    with django_assert_num_queries(0):
+        response = client.get('/')
+    assert response.context['object_list'][0].comment_count == 0
+
+
+def test_authorized_user_gets_own_page(
+    cache_backend, author_client, client, news, comment, detail_url
+):
+    """Аутентифицированный пользователь не получает страницу из кеша."""
+    client.get(detail_url)
+    response = author_client.get(detail_url)
+    assert 'form' in response.context
+    assert 'Редактировать' in response.content.decode()
+
+
+def test_detail_not_modified(
+    client, news, author, detail_url, django_assert_num_queries
+):
+    """
+    Актуальная копия страницы новости подтверждается ответом 304
+    без обращения к базе.
+    """
+    response = client.get(detail_url)
+    etag = response['ETag']
+    last_modified = response['Last-Modified']
+    with django_assert_num_queries(0):
+        response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == NOT_MODIFIED
+    response = client.get(detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == NOT_MODIFIED
+    Comment.objects.create(news=news, author=author, text='Свежий')
+    response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == OK
+
+
+def test_home_not_modified(client, news, comment):
+    """Главная отвечает 304, пока её новости и комментарии не менялись."""
+    etag = client.get('/')['ETag']
+    response = client.get('/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == NOT_MODIFIED
+    comment.delete()
+    response = client.get('/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == OK
+
+
+def test_etag_depends_on_user(news, detail_url, author, user):
+    """Разные пользователи получают разные ETag одной страницы."""
+    etags = set()
+    for current_user in (None, author, user):
+        client = Client()
+        if current_user is not None:
+            client.force_login(current_user)
+        etags.add(client.get(detail_url)['ETag'])
+    assert len(etags) == 3
+
+
+@pytest.mark.parametrize('engine, queries', (
+    ('db', 1), ('cached_db', 0), ('signed_cookies', 0)
+))
+def test_session_and_user_from_cache(
+    engine, queries, settings, author, news, django_assert_num_queries
+):
+    """
+    Повторный запрос аутентифицированного пользователя берёт
+    пользователя из кеша, а сессию — из кеша или из cookie.
+    """
+    settings.SESSION_ENGINE = django_settings.NEWS_SESSION_ENGINES[engine]
+    client = Client()
+    client.force_login(author)
+    url = reverse('news:home')
+    client.get(url)
+    with django_assert_num_queries(queries):
+        response = client.get(url)
+    assert response.context['user'] == author
+
+
+def test_cached_user_follows_changes(author_client, author, news):
+    """Изменение пользователя и смена пароля сбрасывают его запись в кеше."""
+    url = reverse('news:home')
+    author_client.get(url)
+    author.first_name = 'Новое имя'
+    author.save()
+    assert author_client.get(url).context['user'].first_name == 'Новое имя'
+    author.set_password('новый-пароль')
+    author.save()
+    assert not author_client.get(url).context['user'].is_authenticated
+
+
+def test_deleted_user_logged_out(user_client, user, news):
+    """Удалённый пользователь не остаётся в кеше."""
+    url = reverse('news:home')
+    user_client.get(url)
+    user.delete()
+    assert not user_client.get(url).context['user'].is_authenticated
+
+
+def test_cached_user_without_password(author, news):
+    """В кеше нет хеша пароля, а сохранение не затирает пароль."""
+    author.set_password('пароль-автора')
+    author.save()
+    client = Client()
+    client.force_login(author)
+    url = reverse('news:home')
+    client.get(url)
+    assert author.password not in repr(cache.get(f'news:user:{author.pk}'))
+    cached = client.get(url).context['user']
+    cached.first_name = 'Новое имя'
+    cached.save()
+    author.refresh_from_db()
+    assert author.first_name == 'Новое имя'
+    assert author.check_password('пароль-автора')
+    assert client.get(url).context['user'].is_authenticated
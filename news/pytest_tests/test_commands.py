@@ -0,0 +1,113 @@
+import json
+from datetime import date
+
+import pytest
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+
+from news.feed import get_feed
+from news.models import News
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize('format_name', ('jsonl', 'csv'))
+def test_export_import_round_trip(tmp_path, all_news, format_name):
+    """Выгруженные новости загружаются обратно без потерь."""
+    path = tmp_path / f'news.{format_name}'
+    expected = list(News.objects.order_by('pk').values_list(
+        'title', 'text', 'date'
+    ))
+    call_command('export_news', path, batch_size=3)
+    News.objects.all().delete()
+    call_command('import_news', path, batch_size=4)
+    imported = list(News.objects.order_by('pk').values_list(
+        'title', 'text', 'date'
+    ))
+    assert imported == expected
+
+
+def test_import_in_batches(tmp_path):
+    """Новости сохраняются пачками, по одному INSERT на пачку."""
+    path = tmp_path / 'news.jsonl'
+    path.write_text(''.join(
+        json.dumps({'title': f'Новость {index}', 'text': 'Текст'}) + '\n'
+        for index in range(5)
+    ), encoding='utf-8')
+    inserts = []
+
+    def count_inserts(execute, sql, params, many, context):
+        if sql.startswith('INSERT INTO "news_news"'):
+            inserts.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count_inserts):
+        call_command('import_news', path, batch_size=2)
+    assert len(inserts) == 3
+    assert News.objects.count() == 5
+    assert News.objects.filter(date=date.today()).count() == 5
+
+
+def test_import_reports_broken_row(tmp_path):
+    """Ошибка в строке файла называет номер строки."""
+    path = tmp_path / 'news.jsonl'
+    path.write_text(
+        '{"title": "Новость", "text": "Текст"}\n{"title": "Без текста"}\n',
+        encoding='utf-8'
+    )
+    with pytest.raises(CommandError, match='Строка 2'):
+        call_command('import_news', path)
+
+
+@pytest.mark.parametrize('name, content, line', (
+    (
+        'broken.jsonl',
+        '{"title": "Новость", "text": "Текст"}\n{"title": \n', 2
+    ),
+    (
+        'list.jsonl',
+        '{"title": "Новость", "text": "Текст"}\n["Новость"]\n', 2
+    ),
+    (
+        'null.jsonl',
+        '{"title": "Новость", "text": "Текст"}\n'
+        '{"title": null, "text": "Текст"}\n', 2
+    ),
+    (
+        'empty.jsonl',
+        '{"title": "Новость", "text": "Текст"}\n'
+        '{"title": "Новость", "text": " "}\n', 2
+    ),
+    (
+        'date.jsonl',
+        '{"title": "Новость", "text": "Текст"}\n'
+        '{"title": "Новость", "text": "Текст", "date": "2024-13-01"}\n', 2
+    ),
+    # Номер строки CSV считается с заголовком.
+    ('short.csv', 'title,text,date\nНовость,Текст,\nБез текста\n', 3),
+))
+def test_import_rejects_invalid_rows(tmp_path, name, content, line):
+    """Любая некорректная запись — CommandError с номером строки."""
+    path = tmp_path / name
+    path.write_text(content, encoding='utf-8')
+    with pytest.raises(CommandError, match=f'Строка {line}:'):
+        call_command('import_news', path, batch_size=1)
+    assert News.objects.count() == 1
+    with pytest.raises(CommandError, match=f'Строка {line}:'):
+        call_command('import_news', path, batch_size=10)
+    assert News.objects.count() == 1
+
+
+def test_import_error_refreshes_feed(tmp_path, news):
+    """Пачки, сохранённые до ошибки в файле, сразу видны в ленте."""
+    get_feed()
+    path = tmp_path / 'news.jsonl'
+    path.write_text(
+        '{"title": "Новая", "text": "Текст"}\n{"title": "Без текста"}\n',
+        encoding='utf-8'
+    )
+    with pytest.raises(CommandError, match='Строка 2'):
+        call_command('import_news', path, batch_size=1)
+    assert 'Новая' in [item.title for item in get_feed()]
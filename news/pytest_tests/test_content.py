@@ -1,9 +1,19 @@
+import time
+
 import pytest
 
 from django.urls import reverse
 from django.conf import settings
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.core.cache.backends import locmem
+from django.db import connection
+from django.db.models.signals import post_init
+from django.test.utils import CaptureQueriesContext
 
+from news.feed import get_feed
 from news.forms import CommentForm
+from news.models import Comment, News
 
 pytestmark = pytest.mark.django_db
 
@@ -66,3 +76,166 @@ def test_authorized_client_has_form(client, detail_url, author):
     assert 'form' in response.context
     form = response.context.get('form')
     assert isinstance(form, CommentForm)
+
+
+def test_home_comment_count(client, news, comments):
+    """Количество комментариев на главной берётся из аннотации."""
+    response = client.get(reverse('news:home'))
+    object_list = response.context.get('object_list')
+    assert object_list[0].comment_count == news.comment_set.count()
+
+
+def test_home_queries_do_not_grow_with_comments(
+    client, news, author, django_assert_max_num_queries
+):
+    """Число запросов главной страницы не зависит от числа комментариев."""
+    url = reverse('news:home')
+    for _ in range(2):
+        Comment.objects.bulk_create(
+            Comment(news=news, author=author, text='Текст') for _ in range(50)
+        )
+        with django_assert_max_num_queries(2):
+            client.get(url)
+
+
+def test_comments_keyset_pagination(
+    client, news, comments, detail_url, settings
+):
+    """
+    Комментарии выводятся страницами по курсору (created, id):
+    следующая страница продолжает предыдущую без повторов.
+    """
+    settings.COMMENTS_COUNT_ON_PAGE = 1
+    response = client.get(detail_url)
+    first_page = response.context['comments']
+    next_cursor = response.context['next_cursor']
+    assert len(first_page) == 1
+    assert next_cursor is not None
+    response = client.get(
+        reverse('news:comments', args=(news.pk,)), {'after': next_cursor}
+    )
+    second_page = response.context['comments']
+    assert response.context['next_cursor'] is None
+    expected = list(
+        news.comment_set.order_by('created', 'pk').values_list('pk', flat=True)
+    )
+    assert [row['id'] for row in first_page + second_page] == expected
+
+
+def test_comments_page_cost_does_not_depend_on_depth(
+    client, news, author, settings, django_assert_num_queries
+):
+    """Дальняя страница комментариев стоит столько же, сколько первая."""
+    settings.COMMENTS_COUNT_ON_PAGE = 2
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text='Текст') for _ in range(10)
+    )
+    url = reverse('news:comments', args=(news.pk,))
+    with django_assert_num_queries(1):
+        response = client.get(url)
+    cursor = response.context['next_cursor']
+    for _ in range(3):
+        with django_assert_num_queries(1):
+            response = client.get(url, {'after': cursor})
+        cursor = response.context['next_cursor']
+
+
+def test_home_feed_is_kept_up_to_date(
+    author_client, news, author, django_assert_num_queries
+):
+    """
+    Готовая лента главной обновляется сигналами: после новых
+    новостей и комментариев главная не обращается к базе за лентой.
+    """
+    url = reverse('news:home')
+    author_client.get(url)
+    fresh = News.objects.create(title='Свежая', text='Текст ' * 100)
+    Comment.objects.create(news=news, author=author, text='Текст')
+    # Сессия и пользователь тоже берутся из кеша.
+    with django_assert_num_queries(0):
+        response = author_client.get(url)
+    feed = {item.pk: item for item in response.context['object_list']}
+    assert feed[news.pk].comment_count == 1
+    assert feed[fresh.pk].excerpt.endswith('…')
+
+
+def test_excerpt_is_stored_on_save():
+    """Начало текста сохраняется вместе с новостью, в том числе loaddata."""
+    news = News.objects.create(title='Заголовок', text='слово ' * 100)
+    assert news.excerpt == ' '.join(['слово'] * 15) + ' …'
+    call_command('loaddata', 'news.json', verbosity=0)
+    assert not News.objects.filter(excerpt='').exists()
+
+
+def test_home_does_not_load_full_text(client, news):
+    """Для главной страницы полный текст новостей не читается."""
+    with CaptureQueriesContext(connection) as queries:
+        client.get(reverse('news:home'))
+    assert queries.captured_queries
+    for query in queries.captured_queries:
+        assert '"news_news"."text"' not in query['sql']
+
+
+def test_thread_is_streamed_in_chunks(
+    client, news, author, settings, django_assert_num_queries
+):
+    """
+    Вся ветка отдаётся потоком: сначала новость, затем комментарии
+    пачками по порядку, и всё это за два запроса к базе.
+    """
+    settings.COMMENTS_STREAM_CHUNK_SIZE = 2
+    texts = [f'Комментарий {index}' for index in range(5)]
+    for text in texts:
+        Comment.objects.create(news=news, author=author, text=text)
+    with django_assert_num_queries(2):
+        response = client.get(reverse('news:thread', args=(news.pk,)))
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+    assert news.title in chunks[0]
+    assert not any(text in chunks[0] for text in texts)
+    # Начало страницы, три пачки комментариев и конец страницы.
+    assert len(chunks) == 5
+    page = ''.join(chunks)
+    positions = [page.index(text) for text in texts]
+    assert positions == sorted(positions)
+    assert page.rstrip().endswith('</html>')
+
+
+def test_detail_ownership_without_user_objects(
+    author_client, author, user, news, detail_url, django_assert_num_queries
+):
+    """
+    Страница новости — два запроса, новость и комментарии: автор
+    комментария определяется по author_id, объекты User не создаются.
+    """
+    for comment_author in (author, user):
+        Comment.objects.create(news=news, author=comment_author, text='Текст')
+    author_client.get(detail_url)
+    created = []
+
+    def count_users(sender, **kwargs):
+        created.append(sender)
+
+    post_init.connect(count_users, sender=get_user_model())
+    try:
+        with django_assert_num_queries(2):
+            response = author_client.get(detail_url)
+    finally:
+        post_init.disconnect(count_users, sender=get_user_model())
+    assert created == []
+    content = response.content.decode()
+    assert content.count('Редактировать') == 1
+    assert author.username in content and user.username in content
+
+
+def test_feed_expires(news, settings, monkeypatch):
+    """
+    Лента в кеше истекает: процесс, до которого не дошёл сигнал
+    об изменении, через NEWS_CACHE_TIMEOUT строит её заново.
+    """
+    get_feed()
+    # Изменение в другом процессе: сигналы этого процесса его не видят.
+    News.objects.filter(pk=news.pk).update(title='Новый заголовок')
+    assert get_feed()[0].title == news.title
+    later = time.time() + settings.NEWS_CACHE_TIMEOUT + 1
+    monkeypatch.setattr(locmem.time, 'time', lambda: later)
+    assert get_feed()[0].title == 'Новый заголовок'
@@ -1,9 +1,12 @@
+import os
+
 import pytest
 from http.client import NOT_FOUND
 from pytest_django.asserts import assertRedirects, assertFormError
 
 from news.models import Comment
 from news.forms import BAD_WORDS, WARNING
+from news.profanity import FileBadWordsMatcher
 
 COMMENT_TEXT = 'Текст комментария'
 NEW_COMMENT_TEXT = 'Обновлённый комментарий'
@@ -102,3 +105,26 @@ def test_user_cant_edit_comment_of_another_user(
     assert comment.text == COMMENT_TEXT
     assert comment.news == news
     assert comment.author == author
+
+
+def test_user_cant_use_lookalike_letters(author_client, detail_url):
+    """Латинские буквы вместо кириллических не помогают обойти фильтр."""
+    comments_count = Comment.objects.count()
+    response = author_client.post(detail_url, data={'text': 'PEДИCKA'})
+    assertFormError(response, form='form', field='text', errors=WARNING)
+    assert comments_count == Comment.objects.count()
+
+
+def test_bad_words_file_is_reloaded(tmp_path):
+    """Список запрещённых слов перечитывается после изменения файла."""
+    path = tmp_path / 'bad_words.txt'
+    path.write_text('# комментарий\nпервое\n', encoding='utf-8')
+    matcher = FileBadWordsMatcher(path, extra_words=('встроенное',))
+    assert matcher.search('Это ПЕРВОЕ слово') == 'первое'
+    assert matcher.search('встроенное') == 'встроенное'
+    assert matcher.search('второе') is None
+    path.write_text('второе\n', encoding='utf-8')
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert matcher.search('второе') == 'второе'
+    assert matcher.search('первое') is None
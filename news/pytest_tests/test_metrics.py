@@ -0,0 +1,67 @@
+import os
+import re
+from http.client import NOT_FOUND, OK
+
+import pytest
+
+from django.urls import reverse
+
+from news.metrics import registry
+
+pytestmark = pytest.mark.django_db
+
+METRICS_MIDDLEWARE = 'news.middleware.RequestMetricsMiddleware'
+
+
+@pytest.fixture
+def metrics_enabled(settings):
+    """Фикстура: метрики включены, гистограммы пусты."""
+    settings.NEWS_METRICS_ENABLED = True
+    settings.MIDDLEWARE = [METRICS_MIDDLEWARE, *settings.MIDDLEWARE]
+    registry.clear()
+    yield
+    registry.clear()
+
+
+def test_server_timing_header(metrics_enabled, client, news, detail_url):
+    """Ответ содержит число запросов, время в базе и время отрисовки."""
+    response = client.get(detail_url)
+    timing = response['Server-Timing']
+    assert re.search(r'db;dur=[\d.]+;desc="2 SQL"', timing)
+    assert re.search(r'render;dur=[\d.]+', timing)
+    assert re.search(r'total;dur=[\d.]+', timing)
+
+
+def test_metrics_histograms(metrics_enabled, client, news, detail_url):
+    """Гистограммы собираются по именам представлений."""
+    client.get(detail_url)
+    client.get(detail_url)
+    response = client.get(reverse('news:metrics'))
+    assert response.status_code == OK
+    text = response.content.decode()
+    label = f'view="news:detail",worker="{os.getpid()}"'
+    assert f'yanews_request_duration_seconds_count{{{label}}} 2' in text
+    # Второй запрос анонима отдан из кеша: к базе он не обращается.
+    assert f'yanews_db_queries_bucket{{{label},le="0"}} 1' in text
+    assert f'yanews_db_queries_bucket{{{label},le="3"}} 2' in text
+
+
+def test_metrics_labelled_by_worker(metrics_enabled, client, news, detail_url):
+    """Каждый процесс отдаёт свои ряды с меткой своего номера."""
+    client.get(detail_url)
+    text = client.get(reverse('news:metrics')).content.decode()
+    series = [line for line in text.splitlines() if not line.startswith('#')]
+    assert series
+    assert all(f'worker="{os.getpid()}"' in line for line in series)
+
+
+def test_metrics_only_for_local_addresses(metrics_enabled, client):
+    """Страница метрик недоступна с внешних адресов."""
+    response = client.get(reverse('news:metrics'), REMOTE_ADDR='10.0.0.1')
+    assert response.status_code == NOT_FOUND
+
+
+def test_metrics_disabled(client):
+    """Без включённых метрик страница метрик не отдаётся."""
+    response = client.get(reverse('news:metrics'))
+    assert response.status_code == NOT_FOUND
@@ -0,0 +1,151 @@
+from datetime import timedelta
+
+import pytest
+
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from news.models import Comment
+from news.moderation import (
+    FLOOD, REPEATED_TEXT, TOO_MANY_LINKS, FloodWindow, Moderator, analyse,
+    check_links, check_repeated_text, pending_batch, save_verdicts
+)
+
+pytestmark = pytest.mark.django_db
+
+SPAM = 'Лучшие цены только у нас, заходите скорее на наш сайт'
+
+
+@pytest.fixture
+def moderation(settings):
+    """Фикстура: модерация включена."""
+    settings.COMMENT_MODERATION = True
+
+
+def test_text_checks():
+    """Ссылки и повторы находятся, обычный текст проходит."""
+    assert check_links('https://a.example http://b.example www.c.example') == (
+        TOO_MANY_LINKS
+    )
+    assert check_links('Подробнее на https://example.com') is None
+    assert check_repeated_text('купи ' * 20) == REPEATED_TEXT
+    assert check_repeated_text('а' * 30) == REPEATED_TEXT
+    assert check_repeated_text(
+        'Спасибо за новость, очень интересно было почитать про то, как '
+        'развивается проект и что планируют сделать дальше.'
+    ) is None
+
+
+def test_flood_window():
+    """Один текст от трёх авторов — рассылка, но только внутри окна."""
+    window = FloodWindow(seconds=60, authors=3)
+    now = timezone.now()
+    assert not window.add(now, b'key', 1)
+    assert not window.add(now, b'key', 1)
+    assert not window.add(now, b'key', 2)
+    assert window.add(now, b'key', 3)
+    later = now + timedelta(seconds=120)
+    assert not window.add(later, b'key', 4)
+
+
+def test_pending_comment_visible_only_to_author(
+    moderation, author_client, news, detail_url, form_data
+):
+    """Комментарий на проверке видит только его автор."""
+    author_client.post(detail_url, data=form_data)
+    comment = Comment.objects.get()
+    assert comment.status == Comment.Status.PENDING
+    assert form_data['text'] in author_client.get(detail_url).content.decode()
+    assert 'На проверке' in author_client.get(detail_url).content.decode()
+    anonymous = Client().get(detail_url).content.decode()
+    assert form_data['text'] not in anonymous
+
+
+def test_edited_comment_checked_again(moderation, author_client, comment):
+    """Изменённый комментарий снова ждёт проверки."""
+    author_client.post(
+        reverse('news:edit', args=(comment.pk,)), data={'text': 'Новый'}
+    )
+    comment.refresh_from_db()
+    assert comment.status == Comment.Status.PENDING
+
+
+def test_edit_during_check_stays_pending(moderation, author_client, comment):
+    """
+    Решение по старому тексту не публикует комментарий, изменённый
+    во время проверки: новый текст проверяется следующей пачкой.
+    """
+    comment.status = Comment.Status.PENDING
+    comment.save()
+    verdicts = Moderator().moderate(pending_batch(10))
+    author_client.post(
+        reverse('news:edit', args=(comment.pk,)),
+        data={'text': 'Ссылки: http://a.ru http://b.ru http://c.ru'}
+    )
+    save_verdicts(verdicts)
+    comment.refresh_from_db()
+    assert comment.status == Comment.Status.PENDING
+    save_verdicts(Moderator().moderate(pending_batch(10)))
+    comment.refresh_from_db()
+    assert comment.status == Comment.Status.REJECTED
+    assert comment.moderation_reason == TOO_MANY_LINKS
+
+
+@pytest.mark.parametrize('workers', (0, 2))
+def test_worker_publishes_and_rejects(
+    moderation, workers, news, author, django_user_model, client,
+    detail_url
+):
+    """
+    Команда публикует чистые комментарии и отклоняет спам, в том числе
+    один текст от нескольких авторов, и сообщает пропускную способность.
+    """
+    users = [author] + [
+        django_user_model.objects.create(username=f'Спамер {index}')
+        for index in range(2)
+    ]
+    texts = [
+        (author, 'Хорошая новость'),
+        (author, 'купи ' * 20),
+        (author, 'Ссылки: http://a.ru http://b.ru http://c.ru'),
+    ] + [(user, SPAM) for user in users]
+    Comment.objects.bulk_create(
+        Comment(
+            news=news, author=user, text=text, status=Comment.Status.PENDING
+        )
+        for user, text in texts
+    )
+    client.get(detail_url)
+    call_command('moderate_comments', once=True, workers=workers)
+    statuses = list(Comment.objects.order_by('pk').values_list(
+        'status', 'moderation_reason'
+    ))
+    published, rejected = Comment.Status.PUBLISHED, Comment.Status.REJECTED
+    assert statuses == [
+        (published, ''),
+        (rejected, REPEATED_TEXT),
+        (rejected, TOO_MANY_LINKS),
+        (published, ''),
+        (published, ''),
+        (rejected, FLOOD),
+    ]
+    content = client.get(detail_url).content.decode()
+    assert 'Хорошая новость' in content
+    assert 'купи' not in content
+
+
+def test_worker_reports_throughput(moderation, comment, capsys):
+    """Команда сообщает, сколько комментариев проверено и как быстро."""
+    comment.status = Comment.Status.PENDING
+    comment.save()
+    call_command('moderate_comments', once=True, workers=0)
+    assert 'Проверено 1, отклонено 0' in capsys.readouterr().out
+
+
+def test_analyse_returns_plain_values():
+    """Результат проверки в пуле — простые значения."""
+    reason, key = analyse(SPAM)
+    assert reason is None
+    assert isinstance(key, bytes)
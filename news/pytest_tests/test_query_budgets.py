@@ -0,0 +1,101 @@
+from datetime import date
+
+import pytest
+
+from django.urls import reverse
+
+from news.testing import QueryBudget, QueryBudgetExceeded
+from news.urls import urlpatterns
+
+pytestmark = pytest.mark.django_db
+
+ANONYMOUS = pytest.lazy_fixture('client')
+AUTHOR = pytest.lazy_fixture('author_client')
+NEWS = pytest.lazy_fixture('news')
+COMMENT = pytest.lazy_fixture('comment')
+TODAY = date.today()
+
+# Имя маршрута, метод, клиент, объект или аргументы адреса, бюджет.
+# Кеш перед каждым тестом пуст: главная страница тратит один запрос
+# на построение ленты, аутентифицированный клиент — один запрос
+# пользователя. Сессия сохранена в кеш при входе и базу не читает.
+QUERY_BUDGETS = (
+    ('news:home', 'get', ANONYMOUS, None, 1),
+    ('news:home', 'get', AUTHOR, None, 2),
+    ('news:detail', 'get', ANONYMOUS, NEWS, 2),
+    ('news:detail', 'get', AUTHOR, NEWS, 3),
+    ('news:detail', 'post', AUTHOR, NEWS, 4),
+    ('news:comments', 'get', ANONYMOUS, NEWS, 1),
+    ('news:thread', 'get', ANONYMOUS, NEWS, 2),
+    ('news:edit', 'get', AUTHOR, COMMENT, 2),
+    ('news:edit', 'post', AUTHOR, COMMENT, 4),
+    ('news:delete', 'get', AUTHOR, COMMENT, 2),
+    ('news:delete', 'post', AUTHOR, COMMENT, 4),
+    ('news:search', 'get', ANONYMOUS, None, 0),
+    ('news:archive', 'get', ANONYMOUS, None, 1),
+    ('news:archive_year', 'get', ANONYMOUS, (TODAY.year,), 1),
+    ('news:archive_month', 'get', ANONYMOUS, (TODAY.year, TODAY.month), 1),
+    (
+        'news:archive_day', 'get', ANONYMOUS,
+        (TODAY.year, TODAY.month, TODAY.day), 1
+    ),
+    ('news:sitemap', 'get', ANONYMOUS, None, 1),
+    ('news:sitemap_section', 'get', ANONYMOUS, (0,), 2),
+    ('news:metrics', 'get', ANONYMOUS, None, 0),
+    ('news:api_news', 'get', ANONYMOUS, None, 1),
+    ('news:api_news', 'get', AUTHOR, None, 1),
+    ('news:api_news_detail', 'get', ANONYMOUS, NEWS, 1),
+    ('news:api_comments', 'get', ANONYMOUS, NEWS, 1),
+)
+
+
+def url_args(url_object):
+    """Аргументы адреса: готовый кортеж или первичный ключ объекта."""
+    if url_object is None:
+        return ()
+    if isinstance(url_object, tuple):
+        return url_object
+    return (url_object.pk,)
+
+
+def request(client, method, url, data=None):
+    """Запрос с чтением всего ответа, включая потоковый."""
+    response = getattr(client, method)(url, data=data)
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response
+
+
+def test_every_route_has_budget():
+    """У каждого маршрута приложения news есть бюджет запросов."""
+    budgeted = {name for name, *_ in QUERY_BUDGETS}
+    routes = {f'news:{pattern.name}' for pattern in urlpatterns}
+    assert routes <= budgeted
+
+
+@pytest.mark.parametrize(
+    'name, method, parametrized_client, url_object, budget', QUERY_BUDGETS
+)
+def test_view_query_budget(
+    name, method, parametrized_client, url_object, budget, comments,
+    form_data, settings
+):
+    """Представления укладываются в свой бюджет SQL-запросов."""
+    settings.NEWS_METRICS_ENABLED = True
+    data = form_data if method == 'post' else None
+    with QueryBudget(budget):
+        response = request(
+            parametrized_client, method,
+            reverse(name, args=url_args(url_object)), data
+        )
+    assert response.status_code < 400
+
+
+def test_budget_exceeded(news):
+    """Превышение бюджета приводит к ошибке со списком запросов."""
+    @QueryBudget(0)
+    def read_news():
+        return list(type(news).objects.all())
+
+    with pytest.raises(QueryBudgetExceeded, match='news_news'):
+        read_news()
@@ -0,0 +1,66 @@
+import re
+
+import pytest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news.pytest_tests.test_query_budgets import (
+    QUERY_BUDGETS, request, url_args
+)
+
+pytestmark = pytest.mark.django_db
+
+# Полный просмотр таблицы: SCAN без индекса.
+FULL_SCAN = re.compile(r'\bSCAN (?!.*\bUSING\b)')
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+def query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='План запроса в формате SQLite.'
+)
+@pytest.mark.parametrize(
+    'name, method, parametrized_client, url_object, budget', QUERY_BUDGETS
+)
+def test_view_queries_use_indexes(
+    name, method, parametrized_client, url_object, budget, comments,
+    form_data
+):
+    """
+    Запросы представлений читают таблицы по индексам:
+    без полного просмотра и без сортировки во временном B-дереве.
+    """
+    data = form_data if method == 'post' else None
+    with CaptureQueriesContext(connection) as queries:
+        request(
+            parametrized_client, method,
+            reverse(name, args=url_args(url_object)), data
+        )
+    for query in queries.captured_queries:
+        sql = query['sql']
+        if not sql.startswith(('SELECT', 'UPDATE', 'DELETE')):
+            continue
+        plan = query_plan(sql)
+        bad_steps = [
+            step for step in plan
+            if FULL_SCAN.search(step) or TEMP_SORT in step
+        ]
+        assert not bad_steps, f'{sql}\n{plan}'
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='Настройки соединения SQLite.'
+)
+def test_sqlite_connection_tuned():
+    """Соединение с SQLite фиксирует транзакции без fsync."""
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA synchronous')
+        # 1 — NORMAL, по умолчанию 2 — FULL.
+        assert cursor.fetchone()[0] == 1
@@ -0,0 +1,167 @@
+from http import HTTPStatus
+
+import pytest
+
+from django.core.cache import cache
+from django.test import Client
+
+from news.checks import check_rate_limit_cache
+from news.models import Comment
+from news.ratelimit import RateLimiter, get_limiter
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def cache_calls(monkeypatch):
+    """Фикстура: список обращений ограничителя к кешу."""
+    calls = []
+    for name in ('incr', 'add'):
+        method = getattr(cache, name)
+
+        def counted(*args, method=method, name=name, **kwargs):
+            calls.append(name)
+            return method(*args, **kwargs)
+
+        monkeypatch.setattr(cache, name, counted)
+    return calls
+
+
+def test_legitimate_traffic_passes(author_client, detail_url, settings):
+    """Запросы в пределах лимита проходят как обычно."""
+    settings.COMMENT_RATE_LIMITS = {'user': (3, 60), 'ip': (100, 60)}
+    for index in range(3):
+        response = author_client.post(detail_url, {'text': f'Текст {index}'})
+        assert response.status_code == HTTPStatus.FOUND
+    assert Comment.objects.count() == 3
+
+
+def test_flood_is_cut_off(author_client, user, detail_url, settings):
+    """
+    Сверх лимита пользователь получает 429 с Retry-After,
+    а другой пользователь продолжает писать.
+    """
+    settings.COMMENT_RATE_LIMITS = {'user': (3, 60), 'ip': (100, 60)}
+    responses = [
+        author_client.post(detail_url, {'text': f'Текст {index}'})
+        for index in range(10)
+    ]
+    assert [response.status_code for response in responses].count(
+        HTTPStatus.TOO_MANY_REQUESTS
+    ) == 7
+    assert 0 < int(responses[-1]['Retry-After']) <= 60
+    assert Comment.objects.count() == 3
+    other_client = Client()
+    other_client.force_login(user)
+    response = other_client.post(detail_url, {'text': 'Текст'})
+    assert response.status_code == HTTPStatus.FOUND
+
+
+def test_limit_by_address(author_client, user, detail_url, settings):
+    """Лимит по адресу действует на всех пользователей с этого адреса."""
+    settings.COMMENT_RATE_LIMITS = {'user': (100, 60), 'ip': (2, 60)}
+    author_client.post(detail_url, {'text': 'Текст'})
+    author_client.post(detail_url, {'text': 'Текст'})
+    other_client = Client()
+    other_client.force_login(user)
+    response = other_client.post(detail_url, {'text': 'Текст'})
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+
+def test_first_refusal_stops_check(
+    author_client, detail_url, settings, monkeypatch
+):
+    """Отказ по адресу не тратит токен пользователя."""
+    settings.COMMENT_RATE_LIMITS = {'user': (100, 60), 'ip': (1, 60)}
+    author_client.post(detail_url, {'text': 'Текст'})
+    scopes = []
+    hit = RateLimiter.hit
+
+    def record(self, ident, now=None):
+        scopes.append(self.scope)
+        return hit(self, ident, now)
+
+    monkeypatch.setattr(RateLimiter, 'hit', record)
+    response = author_client.post(detail_url, {'text': 'Текст'})
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert scopes == ['ip']
+
+
+def test_reading_is_not_limited(author_client, edit_url, settings):
+    settings.COMMENT_RATE_LIMITS = {'user': (1, 60), 'ip': (1, 60)}
+    for _ in range(3):
+        assert author_client.get(edit_url).status_code == HTTPStatus.OK
+
+
+def test_less_than_one_cache_call_per_check(cache_calls):
+    """
+    Токены берутся пачками, а исчерпанный ключ проверяется
+    без обращения к кешу.
+    """
+    limiter = RateLimiter('test', 100, 60)
+    allowed = [limiter.hit('bot', now=0) == 0 for _ in range(1000)]
+    assert allowed.count(True) == 100
+    assert all(allowed[:100])
+    # Первая пачка из одного токена создаёт ключ окна одним add; затем
+    # incr пачками 2, 4, ..., 32 и последней — остатком лимита.
+    assert len(cache_calls) == 7
+    assert limiter.hit('bot', now=60) == 0
+
+
+def test_steady_user_under_one_cache_call(cache_calls):
+    """Пользователь, выбирающий лимит, тоже тратит меньше обращения."""
+    limiter = RateLimiter('test', 10, 60)
+    assert all(limiter.hit('user', now=0) == 0 for _ in range(10))
+    # add на 1 токен, incr на 2, 4 и остаток 3.
+    assert len(cache_calls) == 4
+
+
+def test_limit_shared_between_processes():
+    """Два процесса с общим кешем вместе не превышают лимит."""
+    first, second = RateLimiter('test', 10, 60), RateLimiter('test', 10, 60)
+    allowed = sum(
+        limiter.hit('bot', now=0) == 0
+        for _ in range(20) for limiter in (first, second)
+    )
+    assert allowed <= 10
+
+
+@pytest.mark.parametrize('processes', (2, 4))
+def test_alternating_processes_get_whole_limit(processes):
+    """
+    Пользователь, чьи запросы попадают то в один процесс, то в другой,
+    получает весь лимит: токены не застревают в пачках процессов.
+    """
+    first, second = (
+        RateLimiter('test', 10, 60, processes),
+        RateLimiter('test', 10, 60, processes),
+    )
+    allowed = [
+        limiter.hit('user', now=0) == 0
+        for _ in range(10) for limiter in (first, second)
+    ]
+    assert allowed == [True] * 10 + [False] * 10
+
+
+def test_process_local_cache(settings, tmp_path):
+    """
+    С кешем в памяти процесса лимит действует в каждом процессе
+    отдельно: пачки не делятся между процессами, а при запуске
+    выдаётся предупреждение. Файловый кеш общий, но его incr
+    не атомарен.
+    """
+    settings.COMMENT_RATE_LIMIT_PROCESSES = 1
+    assert check_rate_limit_cache(None) == []
+    settings.COMMENT_RATE_LIMIT_PROCESSES = 4
+    assert get_limiter('user').processes == 1
+    assert [warning.id for warning in check_rate_limit_cache(None)] == [
+        'news.W001'
+    ]
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': tmp_path,
+    }}
+    assert get_limiter('user').processes == 4
+    assert [warning.id for warning in check_rate_limit_cache(None)] == [
+        'news.W002'
+    ]
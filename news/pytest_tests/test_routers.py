@@ -0,0 +1,158 @@
+import sqlite3
+
+import pytest
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import Client
+from django.urls import reverse
+
+from news.feed import get_feed
+from news.models import Comment, News
+from news.routers import PrimaryReplicaRouter, pin_primary
+from news.write_behind import CommentQueue
+
+pytestmark = pytest.mark.django_db
+
+router = PrimaryReplicaRouter()
+
+
+@pytest.fixture
+def replica(settings):
+    """Фикстура: настроена одна реплика."""
+    settings.NEWS_REPLICAS = ['replica_1']
+    return 'replica_1'
+
+
+def test_reads_go_to_replica(replica):
+    """Новости и комментарии читаются из реплики, запись — в основную."""
+    assert router.db_for_read(News) == replica
+    assert router.db_for_read(Comment) == replica
+    assert router.db_for_write(Comment) == 'default'
+    # Пользователи и сессии всегда читаются из основной базы.
+    assert router.db_for_read(get_user_model()) == 'default'
+
+
+def test_pinned_reads_go_to_primary(replica):
+    """После записи чтение закреплено за основной базой."""
+    with pin_primary():
+        assert router.db_for_read(News) == 'default'
+    assert router.db_for_read(News) == replica
+
+
+@pytest.fixture
+def stale_replica(settings, tmp_path):
+    """
+    Фикстура: реплика — отдельный файл SQLite, копия основной базы
+    на момент вызова фикстуры. Дальнейшие записи в неё не попадают.
+    """
+    alias = 'stale_replica'
+    path = tmp_path / 'replica.sqlite3'
+    connection.ensure_connection()
+    target = sqlite3.connect(path)
+    connection.connection.backup(target)
+    target.close()
+    connections.settings[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(path)
+    }
+    settings.NEWS_REPLICAS = [alias]
+    yield alias
+    connections[alias].close()
+    del connections[alias]
+    del connections.settings[alias]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stale_replica_and_pinned_primary(
+    news, comment, author, form_data_new, stale_replica, settings
+):
+    """
+    С отстающей репликой чтение показывает её данные, пока нет
+    закрепления; после записи и до истечения cookie автор читает
+    из основной базы и видит свежие данные.
+    """
+    Comment.objects.create(news=news, author=author, text='Свежий')
+    url = reverse('news:comments', args=(news.pk,))
+    assert Comment.objects.using(stale_replica).count() == 1
+    assert 'Свежий' not in Client().get(url).content.decode()
+    client = Client()
+    client.force_login(author)
+    assert 'Свежий' not in client.get(url).content.decode()
+    client.post(reverse('news:detail', args=(news.pk,)), data=form_data_new)
+    assert settings.NEWS_PRIMARY_PIN_COOKIE in client.cookies
+    content = client.get(url).content.decode()
+    assert 'Свежий' in content and form_data_new['text'] in content
+    # Cookie истекла: чтение снова идёт в реплику.
+    del client.cookies[settings.NEWS_PRIMARY_PIN_COOKIE]
+    content = client.get(url).content.decode()
+    assert 'Свежий' not in content and form_data_new['text'] not in content
+
+
+@pytest.fixture
+def reads(replica, monkeypatch):
+    """Фикстура: базы, которые выбрал маршрутизатор для чтения."""
+    reads = []
+    db_for_read = PrimaryReplicaRouter.db_for_read
+
+    def record(self, model, **hints):
+        reads.append(db_for_read(self, model, **hints))
+        return 'default'
+
+    monkeypatch.setattr(PrimaryReplicaRouter, 'db_for_read', record)
+    return reads
+
+
+def test_background_jobs_read_primary(reads, news, author, tmp_path):
+    """
+    Запись очереди комментариев, модерация и загрузка новостей
+    вне запроса читают из основной базы: они пересобирают ленту
+    и разбирают очередь, и отстающая реплика дала бы старые данные.
+    """
+    Comment.objects.create(
+        news=news, author=author, text='На проверке',
+        status=Comment.Status.PENDING
+    )
+    get_feed()
+    reads.clear()
+    queue = CommentQueue(autostart=False)
+    queue.put(Comment(news=news, author=author, text='Из очереди'))
+    queue.flush()
+    call_command('moderate_comments', once=True, workers=0)
+    path = tmp_path / 'news.jsonl'
+    path.write_text('{"title": "Новая", "text": "Текст"}\n', encoding='utf-8')
+    call_command('import_news', path)
+    assert reads and set(reads) == {'default'}
+
+
+def test_no_replicas(settings):
+    """Без реплик всё идёт в основную базу."""
+    settings.NEWS_REPLICAS = []
+    assert router.db_for_read(News) == 'default'
+
+
+def test_author_reads_primary_after_comment(
+    replica, settings, author_client, news, detail_url, form_data,
+    monkeypatch
+):
+    """
+    Запрос с комментарием ставит cookie закрепления, и следующие
+    запросы автора читают из основной базы.
+    """
+    response = author_client.post(detail_url, data=form_data)
+    cookie = response.cookies[settings.NEWS_PRIMARY_PIN_COOKIE]
+    assert cookie['max-age'] == settings.NEWS_PRIMARY_PIN_SECONDS
+    reads = []
+    db_for_read = PrimaryReplicaRouter.db_for_read
+
+    def record(self, model, **hints):
+        reads.append(db_for_read(self, model, **hints))
+        return 'default'
+
+    monkeypatch.setattr(PrimaryReplicaRouter, 'db_for_read', record)
+    author_client.get(detail_url)
+    assert reads and set(reads) == {'default'}
+    reads.clear()
+    del author_client.cookies[settings.NEWS_PRIMARY_PIN_COOKIE]
+    author_client.get(reverse('news:comments', args=(news.pk,)))
+    assert replica in reads
@@ -28,6 +28,20 @@ def test_pages_availability_for_author(client, news):
     assert response.status_code == OK
 
 
+def test_comments_page_availability(client, news):
+    """Страница «Показать ещё» доступна анонимному пользователю."""
+    url = reverse('news:comments', args=(news.pk,))
+    response = client.get(url)
+    assert response.status_code == OK
+
+
+def test_comments_page_with_broken_cursor(client, news):
+    """Повреждённый курсор комментариев приводит к ошибке 404."""
+    url = reverse('news:comments', args=(news.pk,))
+    response = client.get(url, {'after': 'не-курсор'})
+    assert response.status_code == NOT_FOUND
+
+
 @pytest.mark.parametrize(
     'parametrized_client, expected_status',
     (
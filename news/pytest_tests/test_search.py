@@ -0,0 +1,87 @@
+import pytest
+
+from django.urls import reverse
+
+from news.models import Comment, News
+from news.search import search
+
+pytestmark = pytest.mark.django_db
+
+
+def found(query):
+    return [(result.kind, result.object_id) for result in search(query)]
+
+
+def test_word_forms_match(news, author):
+    """Поиск находит другие формы слова и подсвечивает их."""
+    comment = Comment.objects.create(
+        news=news, author=author, text='Погода в Москве <b>прекрасная</b>.'
+    )
+    results = search('погоды')
+    assert [(result.kind, result.object_id) for result in results] == [
+        ('comment', comment.pk)
+    ]
+    assert results[0].title == news.title
+    assert results[0].snippet == (
+        '<mark>Погода</mark> в Москве &lt;b&gt;прекрасная&lt;/b&gt;.'
+    )
+
+
+def test_index_follows_changes(news, author):
+    """Индекс обновляется при изменении и удалении."""
+    comment = Comment.objects.create(news=news, author=author, text='Дождь')
+    comment.text = 'Снег'
+    comment.save()
+    assert found('дождь') == []
+    assert found('снегом') == [('comment', comment.pk)]
+    comment.delete()
+    assert found('снег') == []
+
+
+def test_bulk_created_rows_are_indexed(news, author):
+    """Триггеры индексируют и строки из bulk_create."""
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Слово{index} тест')
+        for index in range(3)
+    )
+    assert len(found('тесты')) == 3
+
+
+def test_title_ranks_higher(author):
+    """Совпадение в заголовке важнее совпадения в тексте."""
+    in_text = News.objects.create(title='Новость', text='Про выборы.')
+    in_title = News.objects.create(title='Выборы', text='Подробности.')
+    assert found('выборы') == [
+        ('news', in_title.pk), ('news', in_text.pk)
+    ]
+
+
+def test_all_words_required(news):
+    news.title = 'Футбол и хоккей'
+    news.save()
+    assert found('футбол хоккей') == [('news', news.pk)]
+    assert found('футбол теннис') == []
+
+
+def test_search_page(client, news, django_assert_num_queries):
+    """Страница поиска тратит один запрос к базе."""
+    url = reverse('news:search')
+    with django_assert_num_queries(1):
+        response = client.get(url, {'q': 'заметки'})
+    assert '<mark>заметки</mark>' in response.content.decode()
+    # Запрос из одних служебных слов не идёт в базу.
+    with django_assert_num_queries(0):
+        response = client.get(url, {'q': 'и в на'})
+    assert 'Ничего не найдено' in response.content.decode()
+
+
+def test_only_newest_candidates_ranked(news, author, settings):
+    """Для частого слова ранжируются только самые новые совпадения."""
+    settings.SEARCH_CANDIDATES = 2
+    comments = [
+        Comment.objects.create(news=news, author=author, text='Частое слово')
+        for _ in range(3)
+    ]
+    assert sorted(pk for _, pk in found('частое')) == [
+        comment.pk for comment in comments[1:]
+    ]
@@ -0,0 +1,121 @@
+import pytest
+
+from django.test import Client
+
+from news.cache import news_version
+from news.checks import check_write_behind_processes
+from news.feed import get_feed
+from news.models import Comment
+from news.write_behind import CommentQueue
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def queue(settings, monkeypatch):
+    """
+    Фикстура: отложенная запись включена, очередь без фонового потока.
+
+    Тест сохраняет очередь сам: фоновый поток не видит данных
+    тестовой транзакции.
+    """
+    settings.COMMENT_WRITE_BEHIND = True
+    queue = CommentQueue(batch_size=2, autostart=False)
+    monkeypatch.setattr('news.views.comment_queue', queue)
+    monkeypatch.setattr('news.cache.comment_queue', queue)
+    return queue
+
+
+def test_comment_queued(queue, author_client, detail_url, form_data, user):
+    """
+    Комментарий ставится в очередь и сразу виден автору,
+    но не другим пользователям.
+    """
+    author_client.post(detail_url, data=form_data)
+    assert Comment.objects.count() == 0
+    assert len(queue) == 1
+    response = author_client.get(detail_url)
+    assert form_data['text'] in response.content.decode()
+    assert 'Публикуется' in response.content.decode()
+    other_client = Client()
+    other_client.force_login(user)
+    assert form_data['text'] not in other_client.get(
+        detail_url
+    ).content.decode()
+
+
+def test_flush_saves_in_order_and_invalidates(
+    queue, author_client, news, detail_url
+):
+    """
+    Очередь сохраняется пачками в порядке отправки, а страницы
+    и лента новости обновляются, как при обычном сохранении.
+    """
+    get_feed()
+    version = news_version(news.pk)
+    texts = [f'Комментарий {index}' for index in range(5)]
+    for text in texts:
+        author_client.post(detail_url, data={'text': text})
+    assert queue.flush() == 2
+    queue.drain()
+    assert len(queue) == 0
+    assert list(
+        Comment.objects.order_by('created', 'pk').values_list(
+            'text', flat=True
+        )
+    ) == texts
+    assert news_version(news.pk) != version
+    assert get_feed()[0].comment_count == len(texts)
+    assert 'Публикуется' not in author_client.get(
+        detail_url
+    ).content.decode()
+
+
+def test_pending_comment_changes_etag(
+    queue, author_client, detail_url, form_data
+):
+    """Комментарий в очереди меняет ETag: автор не получит 304."""
+    etag = author_client.get(detail_url)['ETag']
+    author_client.post(detail_url, data=form_data)
+    response = author_client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+
+
+def test_full_queue_saves_at_once(
+    queue, author_client, detail_url, monkeypatch
+):
+    """Комментарий сверх размера очереди сохраняется сразу."""
+    monkeypatch.setattr(queue, 'max_size', 1)
+    author_client.post(detail_url, data={'text': 'В очередь'})
+    author_client.post(detail_url, data={'text': 'Сразу'})
+    assert len(queue) == 1
+    assert list(Comment.objects.values_list('text', flat=True)) == ['Сразу']
+
+
+def test_created_set_on_save(
+    queue, author_client, author, news, detail_url, form_data
+):
+    """
+    Время создания ставит сохранение, а не постановка в очередь:
+    у комментария в очереди его нет, и автор видит комментарий без него.
+    """
+    author_client.post(detail_url, data=form_data)
+    [comment] = queue.pending(news.pk, author.pk)
+    assert comment.created is None
+    assert '<b>None</b>' not in author_client.get(
+        detail_url
+    ).content.decode()
+    queue.drain()
+    assert comment.created is not None
+    assert Comment.objects.get().created == comment.created
+
+
+def test_write_behind_needs_one_process(settings):
+    """С несколькими процессами сервера режим выдаёт предупреждение."""
+    settings.COMMENT_WRITE_BEHIND = True
+    settings.NEWS_WEB_PROCESSES = 1
+    assert check_write_behind_processes(None) == []
+    settings.NEWS_WEB_PROCESSES = 2
+    assert [
+        warning.id for warning in check_write_behind_processes(None)
+    ] == ['news.W003']
@@ -0,0 +1,210 @@
+"""
+Ограничение частоты запросов на запись комментариев.
+
+Счётчики хранятся в кеше COMMENT_RATE_LIMIT_CACHE и растут cache.incr.
+В API кеша нет сравнения с обменом, поэтому корзина токенов сделана
+окнами: в каждом окне длиной period секунд на ключ выдаётся rate
+токенов.
+
+Общий лимит для всех процессов сервера получается, только если кеш
+общий и его incr атомарен (Memcached, Redis). С кешем в памяти процесса
+(locmem, по умолчанию) у каждого процесса свои счётчики, и на деле
+лимит — rate на каждый из COMMENT_RATE_LIMIT_PROCESSES процессов.
+Файловый кеш и кеш в базе общие, но их incr — чтение и запись,
+и одновременные запросы теряют приращения. Для обоих случаев при
+запуске выдаётся предупреждение, см. news.checks.
+
+Процесс берёт токены из счётчика не по одному, а пачками: первая
+пачка — один токен, каждая следующая в том же окне вдвое больше.
+Первая пачка окна создаёт счётчик одним cache.add, следующие берутся
+одним cache.incr, а для ключа, исчерпавшего окно, процесс помнит время
+разблокировки и не обращается к кешу вовсе. Частые запросы и поток
+отказов обходятся меньше чем в одно обращение к кешу на проверку.
+
+Токены, взятые одним процессом, другим не видны. Если счётчик общий
+для нескольких процессов, пачка не больше 1 / LEASE_SHARE доли
+оставшихся в окне токенов на процесс, а у самого лимита токены
+берутся по одному. Непотраченные токены пачки пропадают с концом
+окна: ограничение может быть только строже, но не мягче заданного.
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+
+KEY = 'ratelimit:{scope}:{ident}:{window}'
+# Пачка при общем счётчике — не больше 1 / LEASE_SHARE доли
+# оставшихся в окне токенов на один процесс.
+LEASE_SHARE = 2
+
+
+def limiter_cache():
+    return caches[settings.COMMENT_RATE_LIMIT_CACHE]
+
+
+def is_process_local(backend):
+    """Кеш в памяти процесса: другие процессы его счётчиков не видят."""
+    return isinstance(backend, LocMemCache)
+
+
+def has_atomic_incr(backend):
+    """Бэкенды без своего incr увеличивают значение чтением и записью."""
+    return type(backend).incr is not BaseCache.incr
+
+
+class Lease:
+    """Токены ключа, уже взятые процессом из счётчика окна."""
+
+    def __init__(self, window):
+        self.window = window
+        self.tokens = 0
+        self.size = 1
+        self.claimed = False
+        self.exhausted = False
+
+
+class RateLimiter:
+
+    def __init__(self, scope, rate, period, processes=1):
+        self.scope = scope
+        self.rate = rate
+        self.period = period
+        self.processes = processes
+        self._leases = {}
+        self._window = None
+        self._lock = threading.Lock()
+
+    def lease_size(self, left):
+        """
+        Наибольшая пачка, когда в окне осталось left токенов.
+
+        Токены одного процесса застревают, только если счётчик делят
+        несколько процессов: тогда пачка — малая доля остатка.
+        """
+        if self.processes == 1:
+            return max(1, left)
+        return max(1, left // (self.processes * LEASE_SHARE))
+
+    def claim(self, ident, window, size, first=False):
+        """
+        Берёт до size токенов из счётчика.
+
+        Возвращает, сколько токенов получено и сколько осталось в окне.
+        Первая пачка процесса в окне обычно создаёт счётчик, поэтому
+        сначала пробуется add, остальные — сразу incr.
+        """
+        cache = limiter_cache()
+        key = KEY.format(scope=self.scope, ident=ident, window=window)
+        if first and cache.add(key, size, self.period):
+            used = size
+        else:
+            try:
+                used = cache.incr(key, size)
+            except ValueError:
+                if cache.add(key, size, self.period):
+                    used = size
+                else:
+                    used = cache.incr(key, size)
+        granted = max(0, min(size, self.rate - (used - size)))
+        return granted, max(0, self.rate - used)
+
+    def hit(self, ident, now=None):
+        """
+        Тратит токен ключа ident.
+
+        Возвращает 0, если запрос разрешён, иначе число секунд
+        до начала следующего окна.
+        """
+        now = time.time() if now is None else now
+        window = int(now // self.period)
+        retry_after = math.ceil((window + 1) * self.period - now)
+        with self._lock:
+            if window != self._window:
+                # Токены прошлых окон больше не нужны.
+                self._leases.clear()
+                self._window = window
+            lease = self._leases.get(ident)
+            if lease is None or lease.window != window:
+                lease = self._leases[ident] = Lease(window)
+            if lease.tokens:
+                lease.tokens -= 1
+                return 0
+            if lease.exhausted:
+                return retry_after
+            size, first = lease.size, not lease.claimed
+            lease.claimed = True
+        granted, left = self.claim(ident, window, size, first)
+        with self._lock:
+            if lease.window != window:
+                return 0 if granted else retry_after
+            if granted < size or not left:
+                lease.exhausted = True
+            lease.size = min(size * 2, self.lease_size(left))
+            if not granted:
+                return retry_after
+            lease.tokens += granted - 1
+            return 0
+
+    def reset(self):
+        with self._lock:
+            self._leases.clear()
+
+
+_limiters = {}
+
+
+def get_limiter(scope):
+    """Ограничитель из настройки COMMENT_RATE_LIMITS."""
+    rate, period = settings.COMMENT_RATE_LIMITS[scope]
+    # Счётчики в памяти процесса ни с кем не делятся.
+    processes = 1 if is_process_local(limiter_cache()) else (
+        settings.COMMENT_RATE_LIMIT_PROCESSES
+    )
+    key = (scope, rate, period, processes)
+    if key not in _limiters:
+        _limiters[key] = RateLimiter(scope, rate, period, processes)
+    return _limiters[key]
+
+
+def reset_rate_limits():
+    """Забывает взятые процессом токены, например между тестами."""
+    for limiter in _limiters.values():
+        limiter.reset()
+
+
+class RateLimitMixin:
+    """
+    Ограничивает частоту запросов на запись по пользователю и по адресу.
+
+    Сверх лимита отвечает 429 с заголовком Retry-After. Подключается
+    после LoginRequiredMixin: анонимные запросы уходят на вход раньше.
+    """
+    rate_limited_methods = ('POST',)
+
+    def get_rate_limit_keys(self):
+        request = self.request
+        keys = [('ip', request.META.get('REMOTE_ADDR', ''))]
+        if request.user.is_authenticated:
+            keys.append(('user', request.user.pk))
+        return keys
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in self.rate_limited_methods:
+            # Проверка останавливается на первом отказе: токены
+            # остальных ключей не тратятся.
+            for scope, ident in self.get_rate_limit_keys():
+                retry_after = get_limiter(scope).hit(ident)
+                if retry_after:
+                    response = HttpResponse(
+                        'Слишком много запросов, попробуйте позже.',
+                        status=429,
+                        content_type='text/plain; charset=utf-8',
+                    )
+                    response['Retry-After'] = retry_after
+                    return response
+        return super().dispatch(request, *args, **kwargs)
@@ -0,0 +1,55 @@
+"""
+Маршрутизация запросов к базе между основной базой и репликами.
+
+Чтение моделей приложения news идёт в реплики из настройки
+NEWS_REPLICAS, запись — в основную базу. Пока действует закрепление
+(pin_primary), чтение тоже идёт в основную базу: так автор сразу видит
+свой комментарий, даже если реплика ещё не догнала основную базу.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+READ_FROM_REPLICA_APPS = {'news'}
+
+primary_pinned = ContextVar('news_primary_pinned', default=False)
+
+
+@contextmanager
+def pin_primary():
+    """Внутри контекста все чтения идут в основную базу."""
+    token = primary_pinned.set(True)
+    try:
+        yield
+    finally:
+        primary_pinned.reset(token)
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.NEWS_REPLICAS
+        if (
+            not replicas
+            or primary_pinned.get()
+            or model._meta.app_label not in READ_FROM_REPLICA_APPS
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Основная база и реплики хранят одни и те же данные."""
+        databases = {DEFAULT_DB_ALIAS, *settings.NEWS_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        """Реплики получают схему из основной базы, не из миграций."""
+        return db not in settings.NEWS_REPLICAS
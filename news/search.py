@@ -0,0 +1,217 @@
+"""
+Полнотекстовый поиск по новостям и комментариям.
+
+В SQLite индекс — виртуальная таблица FTS5 news_search. В неё попадают
+основы слов: их выделяет стеммер Snowball для русского языка,
+зарегистрированный в каждом соединении как SQL-функция news_stem.
+Таблицу поддерживают триггеры на news_news и news_comment (миграция
+0007_search), поэтому индекс обновляется и при bulk_create, и при
+загрузке данных, и при отложенной записи комментариев. Вставка
+в эти таблицы из внешних программ, где функции news_stem нет,
+завершится ошибкой.
+
+В PostgreSQL индекс — вычисляемые столбцы search_vector типа tsvector
+с индексами GIN, основы слов выделяет конфигурация russian.
+
+Результаты упорядочены по релевантности (bm25 или ts_rank), фрагмент
+текста с подсвеченными совпадениями строится для каждого результата.
+Комментарии на проверке и отклонённые в результаты не попадают.
+Релевантность считается только для SEARCH_CANDIDATES самых новых
+совпадений: иначе запрос с частым словом оценивал бы большую часть
+таблицы, и время поиска росло бы вместе с ней.
+"""
+import re
+import threading
+from collections import namedtuple
+from functools import lru_cache
+
+import snowballstemmer
+from django.conf import settings
+from django.db import connections, router
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import News
+
+WORD = re.compile(r'\w+')
+
+# Служебные слова не индексируются: они есть почти в каждом тексте,
+# и запрос с ними ранжировал бы большую часть таблицы.
+STOP_WORDS = frozenset((
+    'а', 'без', 'бы', 'в', 'во', 'вот', 'все', 'всё', 'да', 'для', 'до',
+    'его', 'ее', 'её', 'если', 'же', 'за', 'и', 'из', 'или', 'им', 'их',
+    'к', 'как', 'ко', 'ли', 'мы', 'на', 'над', 'не', 'нет', 'ни', 'но',
+    'о', 'об', 'он', 'она', 'они', 'оно', 'от', 'по', 'под', 'при', 'с',
+    'со', 'так', 'там', 'то', 'тот', 'ты', 'у', 'уже', 'что', 'это', 'я',
+))
+
+SearchResult = namedtuple('SearchResult', (
+    'kind', 'object_id', 'news_id', 'title', 'snippet', 'rank'
+))
+
+_stemmer = snowballstemmer.stemmer('russian')
+_stemmer_lock = threading.Lock()
+
+# Начало и конец совпадения во фрагменте от ts_headline.
+START_MARK, STOP_MARK = '\x02', '\x03'
+
+SQLITE_SEARCH = '''
+    SELECT hit.kind, hit.object_id, hit.news_id, news.title,
+           COALESCE(comment.text, news.text), hit.rank
+    FROM (
+        SELECT kind, object_id, news_id,
+               bm25(news_search, 0, 0, 0, 10.0, 1.0) AS rank
+        FROM news_search
+        WHERE news_search MATCH %s AND rowid >= (
+            SELECT coalesce(min(rowid), 0) FROM (
+                SELECT rowid FROM news_search
+                WHERE news_search MATCH %s
+                ORDER BY rowid DESC
+                LIMIT %s
+            )
+        )
+        ORDER BY rank
+        LIMIT %s
+    ) AS hit
+    JOIN news_news AS news ON news.id = hit.news_id
+    LEFT JOIN news_comment AS comment
+        ON hit.kind = 'comment' AND comment.id = hit.object_id
+    WHERE hit.kind = 'news' OR comment.status = 'published'
+    ORDER BY hit.rank
+'''
+
+POSTGRESQL_SEARCH = '''
+    WITH query AS (
+        SELECT websearch_to_tsquery('russian', %s) AS query
+    ), news_candidate AS (
+        SELECT news.id, news.search_vector
+        FROM news_news AS news, query
+        WHERE news.search_vector @@ query.query
+        ORDER BY news.id DESC
+        LIMIT %s
+    ), comment_candidate AS (
+        SELECT comment.id, comment.news_id, comment.search_vector
+        FROM news_comment AS comment, query
+        WHERE comment.search_vector @@ query.query
+            AND comment.status = 'published'
+        ORDER BY comment.id DESC
+        LIMIT %s
+    ), hit AS (
+        SELECT 'news' AS kind, news.id AS object_id, news.id AS news_id,
+               ts_rank(news.search_vector, query.query) AS rank
+        FROM news_candidate AS news, query
+        UNION ALL
+        SELECT 'comment', comment.id, comment.news_id,
+               ts_rank(comment.search_vector, query.query)
+        FROM comment_candidate AS comment, query
+        ORDER BY rank DESC
+        LIMIT %s
+    )
+    SELECT hit.kind, hit.object_id, hit.news_id, news.title,
+           ts_headline(
+               'russian', COALESCE(comment.text, news.text), query.query,
+               %s
+           ),
+           hit.rank
+    FROM hit
+    CROSS JOIN query
+    JOIN news_news AS news ON news.id = hit.news_id
+    LEFT JOIN news_comment AS comment
+        ON hit.kind = 'comment' AND comment.id = hit.object_id
+    ORDER BY hit.rank DESC
+'''
+
+
+@lru_cache(maxsize=100_000)
+def stem(word):
+    """Основа одного слова."""
+    with _stemmer_lock:
+        return _stemmer.stemWord(word.lower().replace('ё', 'е'))
+
+
+def stems(text):
+    """Основы значимых слов текста по порядку."""
+    return [
+        stem(word) for word in WORD.findall(text.lower())
+        if word not in STOP_WORDS
+    ]
+
+
+def stem_text(text):
+    """Текст для индекса FTS5: основы слов через пробел."""
+    return ' '.join(stems(text)) if text else ''
+
+
+def register_functions(connection):
+    """Регистрирует news_stem в новом соединении с SQLite."""
+    connection.connection.create_function(
+        'news_stem', 1, stem_text, deterministic=True
+    )
+
+
+def highlight(text, query_stems, words=None):
+    """
+    Фрагмент текста вокруг первого совпадения с подсветкой <mark>.
+
+    Текст экранируется, поэтому результат можно выводить как есть.
+    """
+    words = words or settings.SEARCH_SNIPPET_WORDS
+    matches = [
+        (match, stem(match.group()) in query_stems)
+        for match in WORD.finditer(text)
+    ]
+    found = [index for index, (_, hit) in enumerate(matches) if hit]
+    first = max(0, (found[0] if found else 0) - words // 3)
+    window = matches[first:first + words]
+    if not window:
+        return escape(text)
+    parts = ['…' if first else '']
+    position = window[0][0].start()
+    for match, hit in window:
+        parts.append(escape(text[position:match.start()]))
+        word = escape(match.group())
+        parts.append(f'<mark>{word}</mark>' if hit else word)
+        position = match.end()
+    if first + words < len(matches):
+        parts.append(' …')
+    else:
+        parts.append(escape(text[position:]))
+    return mark_safe(''.join(parts))
+
+
+def mark(headline):
+    """Фрагмент от ts_headline: экранирование и подсветка <mark>."""
+    return mark_safe(
+        escape(headline)
+        .replace(START_MARK, '<mark>')
+        .replace(STOP_MARK, '</mark>')
+    )
+
+
+def search(query, limit=None):
+    """Новости и комментарии, подходящие к запросу, по релевантности."""
+    query_stems = set(stems(query))
+    if not query_stems:
+        return []
+    limit = limit or settings.SEARCH_RESULTS_COUNT
+    candidates = settings.SEARCH_CANDIDATES
+    connection = connections[router.db_for_read(News)]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(POSTGRESQL_SEARCH, (
+                query, candidates, candidates, limit,
+                f'StartSel={START_MARK}, StopSel={STOP_MARK}, '
+                f'MaxWords={settings.SEARCH_SNIPPET_WORDS}'
+            ))
+            return [
+                SearchResult(*row[:4], mark(row[4]), row[5])
+                for row in cursor.fetchall()
+            ]
+        # Основы состоят из букв и цифр, в кавычках их не нужно
+        # экранировать. Слова запроса объединяются через AND.
+        match = ' '.join(f'"{word}"' for word in query_stems)
+        cursor.execute(SQLITE_SEARCH, (match, match, candidates, limit))
+        return [
+            SearchResult(*row[:4], highlight(row[4], query_stems), row[5])
+            for row in cursor.fetchall()
+        ]
@@ -0,0 +1,106 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import archive, feed, search
+from .cache import invalidate_news, invalidate_user
+from .models import Comment, News, make_excerpt
+from .moderation import comments_moderated
+from .write_behind import comments_flushed
+
+
+@receiver(pre_save, sender=News)
+def fill_news_fields(sender, instance, raw, **kwargs):
+    """
+    Начало текста для главной страницы сохраняется вместе с новостью.
+
+    Сигнал срабатывает и при loaddata, в отличие от метода save().
+    При loaddata не срабатывает и auto_now, поэтому время изменения
+    тоже заполняется здесь.
+    """
+    instance.excerpt = make_excerpt(instance.text)
+    if raw and instance.updated_at is None:
+        instance.updated_at = timezone.now()
+
+
+@receiver(pre_save, sender=News)
+def remember_news_date(sender, instance, raw, using, **kwargs):
+    """При изменении даты новости пересчитывается и прежний месяц."""
+    instance._previous_date = None
+    if not raw and not instance._state.adding:
+        instance._previous_date = News.objects.using(using).filter(
+            pk=instance.pk
+        ).values_list('date', flat=True).first()
+
+
+@receiver((post_save, post_delete), sender=News)
+def news_changed(sender, instance, using, **kwargs):
+    """Новость изменилась — её страницы, главная и архив устарели."""
+    invalidate_news(instance.pk)
+    feed.news_changed(instance)
+    archive.news_dates_changed(
+        instance.date, getattr(instance, '_previous_date', None),
+        using=using
+    )
+
+
+def news_comments_changed(news_ids):
+    """
+    Комментарии новостей изменились — их страницы устарели.
+
+    Время изменения новостей сдвигается, чтобы условные запросы
+    к их страницам получили новый ответ.
+    """
+    News.objects.filter(pk__in=news_ids).update(updated_at=timezone.now())
+    for news_id in news_ids:
+        invalidate_news(news_id)
+        feed.comment_changed(news_id)
+
+
+@receiver((post_save, post_delete), sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    news_comments_changed([instance.news_id])
+
+
+@receiver(comments_flushed)
+def queued_comments_saved(sender, news_ids, **kwargs):
+    """Очередь сохранила пачку комментариев без сигнала post_save."""
+    news_comments_changed(news_ids)
+
+
+@receiver(comments_moderated)
+def comments_checked(sender, news_ids, **kwargs):
+    """Модерация опубликовала или отклонила комментарии через update()."""
+    news_comments_changed(news_ids)
+
+
+@receiver((post_save, post_delete), sender=get_user_model())
+def user_changed(sender, instance, **kwargs):
+    """Пользователь из кеша не должен пережить смену пароля или удаление."""
+    invalidate_user(instance.pk)
+
+
+@receiver(connection_created)
+def register_search_functions(sender, connection, **kwargs):
+    """Функция news_stem нужна триггерам поискового индекса SQLite."""
+    if connection.vendor == 'sqlite':
+        search.register_functions(connection)
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    """
+    Новое соединение с SQLite переводится в режим WAL.
+
+    Параллельные запросы на чтение перестают ждать запись, а при
+    synchronous=NORMAL фиксация транзакции не ждёт fsync: при сбое
+    питания теряются последние транзакции, но база остаётся целой.
+    """
+    if connection.vendor != 'sqlite' or not settings.NEWS_SQLITE_TUNING:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
@@ -0,0 +1,104 @@
+"""
+Карта сайта для поисковых систем.
+
+Индекс перечисляет разделы по SITEMAP_SECTION_SIZE адресов; раздел
+с номером n содержит новости с первичными ключами от n * size + 1
+до (n + 1) * size. Индексу нужен один запрос Max(pk), раздел читается
+диапазоном по первичному ключу и отдаётся потоком: время и память
+не зависят ни от номера раздела, ни от размера таблицы.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import CharField, Max
+from django.db.models.functions import Cast, Left
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.html import escape
+from django.views import generic
+
+from .models import News
+from .pagination import MAX_PK
+
+CONTENT_TYPE = 'application/xml; charset=utf-8'
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+NAMESPACE = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+# Столько адресов склеивается в одну часть потока.
+CHUNK_SIZE = 1000
+# Первичный ключ-заглушка: адрес новости строится один раз на раздел.
+PK_PLACEHOLDER = 999_999_999
+
+
+def sections_count(max_pk, size=None):
+    size = size or settings.SITEMAP_SECTION_SIZE
+    return (max_pk - 1) // size + 1 if max_pk else 0
+
+
+def section_bounds(section, size=None):
+    """
+    Первый и последний первичный ключ раздела.
+
+    Для раздела за пределами целочисленного столбца базы выбрасывает
+    Http404: такой ключ не поместился бы в запрос.
+    """
+    size = size or settings.SITEMAP_SECTION_SIZE
+    first = section * size + 1
+    if first > MAX_PK:
+        raise Http404('Такого раздела нет.')
+    return first, min((section + 1) * size, MAX_PK)
+
+
+class SitemapIndex(generic.View):
+    """Список разделов карты сайта."""
+
+    def get(self, request, *args, **kwargs):
+        max_pk = News.objects.aggregate(max_pk=Max('pk'))['max_pk']
+        lines = [XML_HEADER, f'<sitemapindex xmlns="{NAMESPACE}">\n']
+        for section in range(sections_count(max_pk)):
+            location = request.build_absolute_uri(
+                reverse('news:sitemap_section', args=(section,))
+            )
+            lines.append(
+                f'<sitemap><loc>{escape(location)}</loc></sitemap>\n'
+            )
+        lines.append('</sitemapindex>\n')
+        return HttpResponse(''.join(lines), content_type=CONTENT_TYPE)
+
+
+class SitemapSection(generic.View):
+    """Один раздел карты сайта, потоком."""
+
+    def get(self, request, *args, **kwargs):
+        first, last = section_bounds(self.kwargs['section'])
+        # Дата изменения приходит строкой ГГГГ-ММ-ДД (в UTC): разбор
+        # значения в datetime занимал бы большую часть времени ответа.
+        rows = News.objects.filter(
+            pk__gte=first, pk__lte=last
+        ).order_by('pk').values_list(
+            'pk', Left(Cast('updated_at', CharField()), 10)
+        )
+        rows = rows.using(rows.db)
+        # Пустой раздел есть только за пределами индекса.
+        if not rows.exists():
+            raise Http404('Такого раздела нет.')
+        location = escape(request.build_absolute_uri(
+            reverse('news:detail', args=(PK_PLACEHOLDER,))
+        )).replace(str(PK_PLACEHOLDER), '{}')
+        return StreamingHttpResponse(
+            self.stream(rows, location), content_type=CONTENT_TYPE
+        )
+
+    def stream(self, rows, location):
+        yield XML_HEADER + f'<urlset xmlns="{NAMESPACE}">\n'
+        template = (
+            '<url><loc>' + location + '</loc><lastmod>{}</lastmod></url>\n'
+        )
+        rows = rows.iterator(chunk_size=CHUNK_SIZE)
+        while True:
+            chunk = list(islice(rows, CHUNK_SIZE))
+            if not chunk:
+                break
+            yield ''.join(
+                template.format(pk, updated) for pk, updated in chunk
+            )
+        yield '</urlset>\n'
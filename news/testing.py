@@ -0,0 +1,54 @@
+"""Инструменты для тестов приложения."""
+from contextlib import ContextDecorator
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryBudget(ContextDecorator):
+    """
+    Ограничивает число SQL-запросов внутри блока или функции.
+
+    Используется как контекстный менеджер или декоратор:
+
+        with QueryBudget(3):
+            client.get(url)
+
+        @QueryBudget(3)
+        def test_view(client):
+            ...
+
+    При превышении бюджета выбрасывается QueryBudgetExceeded
+    со списком выполненных запросов.
+    """
+
+    def __init__(self, budget, using=DEFAULT_DB_ALIAS):
+        self.budget = budget
+        self.using = using
+
+    def __enter__(self):
+        self.context = CaptureQueriesContext(connections[self.using])
+        self.context.__enter__()
+        return self.context
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.context.__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return False
+        executed = len(self.context)
+        if executed > self.budget:
+            queries = '\n'.join(
+                f'{index}. {query["sql"]}'
+                for index, query in enumerate(
+                    self.context.captured_queries, start=1
+                )
+            )
+            raise QueryBudgetExceeded(
+                f'Бюджет {self.budget} запросов превышен: '
+                f'выполнено {executed}.\n{queries}'
+            )
+        return False
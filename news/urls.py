@@ -1,16 +1,69 @@
+from django.conf import settings
 from django.urls import path
 
-from news import views
+from news import api, async_views, sitemap, views
 
 app_name = 'news'
 
+if settings.NEWS_ASYNC_VIEWS:
+    news_list = async_views.news_list
+    news_detail = async_views.news_detail
+else:
+    news_list = views.NewsList.as_view()
+    news_detail = views.NewsDetailView.as_view()
+
 urlpatterns = [
-    path('', views.NewsList.as_view(), name='home'),
-    path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path('', news_list, name='home'),
+    path('news/<int:pk>/', news_detail, name='detail'),
+    path(
+        'news/<int:pk>/comments/',
+        views.NewsComments.as_view(),
+        name='comments'
+    ),
+    path(
+        'news/<int:pk>/thread/',
+        views.NewsThread.as_view(),
+        name='thread'
+    ),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
         name='delete'
     ),
     path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
+    path('search/', views.Search.as_view(), name='search'),
+    path('archive/', views.Archive.as_view(), name='archive'),
+    path(
+        'archive/<int:year>/',
+        views.Archive.as_view(),
+        name='archive_year'
+    ),
+    path(
+        'archive/<int:year>/<int:month>/',
+        views.ArchiveList.as_view(),
+        name='archive_month'
+    ),
+    path(
+        'archive/<int:year>/<int:month>/<int:day>/',
+        views.ArchiveList.as_view(),
+        name='archive_day'
+    ),
+    path('sitemap.xml', sitemap.SitemapIndex.as_view(), name='sitemap'),
+    path(
+        'sitemap-<int:section>.xml',
+        sitemap.SitemapSection.as_view(),
+        name='sitemap_section'
+    ),
+    path('metrics/', views.Metrics.as_view(), name='metrics'),
+    path('api/news/', api.NewsListApi.as_view(), name='api_news'),
+    path(
+        'api/news/<int:pk>/',
+        api.NewsDetailApi.as_view(),
+        name='api_news_detail'
+    ),
+    path(
+        'api/news/<int:pk>/comments/',
+        api.CommentListApi.as_view(),
+        name='api_comments'
+    ),
 ]
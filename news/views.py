@@ -1,49 +1,150 @@
+from datetime import date
+from itertools import islice
+
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db.models import F
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.template.loader import get_template, render_to_string
 from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.http import condition
 
+from .archive import month_bounds
+from .cache import (
+    AnonymousPageCacheMixin, get_news, home_etag, news_etag,
+    news_last_modified, news_version, pending_comments
+)
+from .feed import get_feed
 from .forms import CommentForm
-from .models import Comment, News
+from .metrics import registry
+from .models import Comment, MonthlyNewsCount, News
+from .pagination import after_cursor, comments_page, make_cursor
+from .ratelimit import RateLimitMixin
+from .search import search
+from .write_behind import comment_queue
 
 
-class NewsList(generic.ListView):
+@method_decorator(condition(etag_func=home_etag), name='get')
+class NewsList(AnonymousPageCacheMixin, generic.ListView):
     """Список новостей."""
     model = News
     template_name = 'news/home.html'
+    page_cache_name = 'home'
 
     def get_queryset(self):
         """
         Выводим только несколько последних новостей.
 
-        Их количество определяется в настройках проекта.
+        Их количество определяется в настройках проекта. Список берётся
+        из готовой ленты в кеше, см. news.feed.
+        """
+        return get_feed()
+
+
+def comment_rows(news_id, user_id=None):
+    """
+    Комментарии новости строками values() для includes/comments.html.
+
+    Из пользователей читается только имя, а автор комментария
+    определяется сравнением author_id с user.pk: объекты User
+    для комментариев не создаются. Неопубликованные комментарии
+    видит только их автор.
+    """
+    return Comment.objects.visible_to(user_id).filter(
+        news_id=news_id
+    ).values(
+        'id', 'created', 'text', 'author_id', 'status',
+        author_name=F('author__username')
+    )
+
+
+def pending_row(comment):
+    """Комментарий из очереди записи в виде строки comment_rows."""
+    return {
+        'id': comment.pk,
+        'created': comment.created,
+        'text': comment.text,
+        'author_id': comment.author_id,
+        'status': comment.status,
+        'author_name': comment.author.username,
+    }
+
+
+class CommentPageMixin:
+    """Страница комментариев к новости по курсору из параметра after."""
+
+    def get_comments_page(self, news_id):
+        """
+        Страница комментариев и курсор следующей.
+
+        В конце последней страницы автор видит свои комментарии,
+        которые ещё стоят в очереди записи.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        try:
+            comments, next_cursor = comments_page(
+                comment_rows(news_id, self.request.user.pk),
+                self.request.GET.get('after')
+            )
+        except ValueError:
+            raise Http404('Некорректный курсор.')
+        if next_cursor is None:
+            comments += map(
+                pending_row, pending_comments(self.request, news_id)
+            )
+        return comments, next_cursor
 
 
-class NewsDetail(generic.DetailView):
+class NewsDetail(
+        AnonymousPageCacheMixin,
+        CommentPageMixin,
+        generic.DetailView
+):
     model = News
     template_name = 'news/detail.html'
+    page_cache_name = 'detail'
 
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        """Новость, уже прочитанная валидаторами условного GET."""
+        news = get_news(self.request, self.kwargs['pk'])
+        if news is None:
+            raise Http404('Новость не найдена.')
+        return news
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context['comments'], context['next_cursor'] = (
+            self.get_comments_page(self.object.pk)
+        )
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
         return context
 
 
+class NewsComments(
+        AnonymousPageCacheMixin,
+        CommentPageMixin,
+        generic.TemplateView
+):
+    """Следующая страница комментариев к новости («Показать ещё»)."""
+    template_name = 'news/comments.html'
+    page_cache_name = 'comments'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['news_id'] = self.kwargs['pk']
+        context['comments'], context['next_cursor'] = (
+            self.get_comments_page(self.kwargs['pk'])
+        )
+        return context
+
+
 class NewsComment(
         LoginRequiredMixin,
+        RateLimitMixin,
+        CommentPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -59,16 +160,33 @@ class NewsComment(
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
-        comment.save()
+        if not (
+            settings.COMMENT_WRITE_BEHIND and comment_queue.put(comment)
+        ):
+            comment.save()
         return super().form_valid(form)
 
+    def get_context_data(self, **kwargs):
+        """Форма с ошибками показывается на странице новости."""
+        context = super().get_context_data(**kwargs)
+        context['comments'], context['next_cursor'] = (
+            self.get_comments_page(self.object.pk)
+        )
+        context['cache_version'] = news_version(self.object.pk)
+        context['cache_timeout'] = settings.NEWS_CACHE_TIMEOUT
+        return context
+
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
 
+    @method_decorator(condition(
+        etag_func=news_etag, last_modified_func=news_last_modified
+    ))
     def get(self, request, *args, **kwargs):
         view = NewsDetail.as_view()
         return view(request, *args, **kwargs)
@@ -78,19 +196,159 @@ class NewsDetailView(generic.View):
         return view(request, *args, **kwargs)
 
 
-class CommentBase(LoginRequiredMixin):
+class NewsThread(generic.DetailView):
+    """
+    Новость со всеми комментариями одной страницей, потоком.
+
+    Сначала отправляется страница до списка комментариев, затем
+    комментарии пачками по COMMENTS_STREAM_CHUNK_SIZE, затем конец
+    страницы. Комментарии читаются из базы такими же пачками, поэтому
+    время до первого байта и память не зависят от длины ветки.
+    """
+    model = News
+    template_name = 'news/thread.html'
+    comments_template_name = 'includes/comments.html'
+    comments_marker = '<!-- comments -->'
+
+    def get_object(self, queryset=None):
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
+
+    def render_to_response(self, context, **response_kwargs):
+        context['comments_marker'] = self.comments_marker
+        head, tail = render_to_string(
+            self.template_name, context, self.request
+        ).split(self.comments_marker)
+        comments = comment_rows(
+            self.object.pk, self.request.user.pk
+        ).order_by('created', 'pk')
+        # База выбирается сейчас: поток читается уже после выхода
+        # из представления, когда закрепление за основной базой снято.
+        comments = comments.using(comments.db)
+        return StreamingHttpResponse(
+            self.stream(head, comments, tail), **response_kwargs
+        )
+
+    def stream(self, head, comments, tail):
+        yield head
+        template = get_template(self.comments_template_name)
+        size = settings.COMMENTS_STREAM_CHUNK_SIZE
+        rows = comments.iterator(chunk_size=size)
+        chunk = list(islice(rows, size))
+        # Для пустой ветки шаблон выводит «никто ничего не написал».
+        yield template.render({'comments': chunk}, self.request)
+        while len(chunk) == size:
+            chunk = list(islice(rows, size))
+            if chunk:
+                yield template.render({'comments': chunk}, self.request)
+        yield tail
+
+
+class Search(generic.TemplateView):
+    """Поиск по новостям и комментариям."""
+    template_name = 'news/search.html'
+    query_max_length = 200
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()[:self.query_max_length]
+        context['query'] = query
+        context['results'] = search(query) if query else []
+        return context
+
+
+class Archive(generic.TemplateView):
+    """
+    Месяцы, за которые есть новости, с их числом.
+
+    Без года — весь архив, с годом — только его месяцы. Страница
+    читает готовую таблицу MonthlyNewsCount одним запросом.
+    """
+    template_name = 'news/archive.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        months = MonthlyNewsCount.objects.all()
+        year = self.kwargs.get('year')
+        if year is not None:
+            months = list(months.filter(year=year))
+            if not months:
+                raise Http404('Новостей за этот год нет.')
+        context['months'] = months
+        return context
+
+
+class ArchiveList(generic.ListView):
+    """
+    Новости за месяц или за день, от новых к старым.
+
+    Страницы листаются курсором по индексу на дате, как комментарии:
+    страница из глубины архива читается так же быстро, как последняя.
+    """
+    template_name = 'news/archive_list.html'
+    context_object_name = 'news_list'
+
+    def get_period(self):
+        """Начало и конец периода; конец в период не входит."""
+        try:
+            if 'day' in self.kwargs:
+                start = date(
+                    self.kwargs['year'], self.kwargs['month'],
+                    self.kwargs['day']
+                )
+                return start, date.fromordinal(start.toordinal() + 1)
+            return month_bounds(self.kwargs['year'], self.kwargs['month'])
+        except ValueError:
+            raise Http404('Такой даты нет.')
+
+    def get_queryset(self):
+        start, end = self.get_period()
+        self.period = start
+        queryset = News.objects.filter(
+            date__gte=start, date__lt=end
+        ).only('pk', 'title', 'date', 'excerpt')
+        cursor = self.request.GET.get('after')
+        size = settings.NEWS_ARCHIVE_PAGE_SIZE
+        try:
+            news = list(
+                after_cursor(queryset, 'date', cursor, True)[:size + 1]
+            )
+        except ValueError:
+            raise Http404('Некорректный курсор.')
+        if not news:
+            raise Http404('Новостей за этот период нет.')
+        self.next_cursor = None
+        if len(news) > size:
+            news = news[:size]
+            self.next_cursor = make_cursor(news[-1].date, news[-1].pk)
+        return news
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['period'] = self.period
+        context['by_day'] = 'day' in self.kwargs
+        context['next_cursor'] = self.next_cursor
+        return context
+
+
+class CommentBase(LoginRequiredMixin, RateLimitMixin):
     """Базовый класс для работы с комментариями."""
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
-        """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        """
+        Пользователь может работать только со своими комментариями.
+
+        Новость подгружается сразу: её заголовок есть на страницах
+        редактирования и удаления.
+        """
+        return self.model.objects.filter(
+            author=self.request.user
+        ).select_related('news')
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -102,3 +360,24 @@ class CommentUpdate(CommentBase, generic.UpdateView):
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+
+class Metrics(generic.View):
+    """
+    Метрики запросов в формате Prometheus, только для локальных адресов.
+
+    Отдаёт гистограммы одного процесса, того, что принял запрос,
+    с меткой worker, см. news.metrics.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if (
+            not settings.NEWS_METRICS_ENABLED
+            or request.META.get('REMOTE_ADDR')
+            not in settings.METRICS_ALLOWED_IPS
+        ):
+            raise Http404
+        return HttpResponse(
+            registry.render(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
@@ -0,0 +1,170 @@
+"""
+Отложенная запись комментариев.
+
+При включённой настройке COMMENT_WRITE_BEHIND представление проверяет
+форму и ставит комментарий в очередь в памяти процесса, не дожидаясь
+базы. Фоновый поток сохраняет очередь пачками через bulk_create: одна
+транзакция на пачку вместо транзакции на комментарий.
+
+Очередь общая и обрабатывается одним потоком по порядку поступления,
+поэтому комментарии к каждой новости сохраняются в том порядке,
+в котором были отправлены. Пока комментарий не сохранён, его видит
+только автор: см. pending(). Время создания комментарию ставит
+bulk_create при сохранении, до этого его нет.
+
+Очередь и несохранённые комментарии видны только процессу, который
+их принял. Если процессов сервера несколько, следующий запрос автора
+может попасть в другой процесс: тот не покажет комментарий и может
+ответить 304 по старому ETag. Поэтому режим рассчитан на один процесс,
+а при NEWS_WEB_PROCESSES больше одного при запуске выдаётся
+предупреждение, см. news.checks.
+
+Очередь ограничена COMMENT_QUEUE_MAX_SIZE комментариями: в полную
+очередь put() комментарий не ставит, и представление сохраняет его
+сразу.
+
+bulk_create не отправляет post_save, поэтому после сохранения пачки
+отправляется сигнал comments_flushed с ключами затронутых новостей.
+Его обработчики пересобирают ленту, поэтому пачка сохраняется
+с чтением из основной базы: отстающая реплика дала бы старую ленту.
+Комментарии, не сохранённые до остановки процесса, теряются только
+при аварийном завершении: при обычном выходе очередь дописывается.
+"""
+import atexit
+import logging
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+from django.dispatch import Signal
+
+from .models import Comment
+from .routers import pin_primary
+
+logger = logging.getLogger(__name__)
+
+# Отправляется после сохранения пачки, аргумент news_ids.
+comments_flushed = Signal()
+
+
+class CommentQueue:
+
+    def __init__(
+        self, batch_size=None, interval=None, autostart=True, max_size=None
+    ):
+        self.batch_size = batch_size or settings.COMMENT_QUEUE_BATCH_SIZE
+        self.interval = interval or settings.COMMENT_QUEUE_INTERVAL
+        self.max_size = max_size or settings.COMMENT_QUEUE_MAX_SIZE
+        self.autostart = autostart
+        self._items = deque()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker = None
+
+    def put(self, comment):
+        """
+        Ставит несохранённый комментарий в очередь.
+
+        Возвращает False, если очередь полна: тогда комментарий нужно
+        сохранить сразу.
+        """
+        with self._lock:
+            if len(self._items) >= self.max_size:
+                return False
+            self._items.append(comment)
+            self._pending.setdefault(comment.news_id, []).append(comment)
+            size = len(self._items)
+        if self.autostart:
+            self.start()
+        if size >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def pending(self, news_id, author_id):
+        """Несохранённые комментарии автора к новости по порядку."""
+        with self._lock:
+            return [
+                comment for comment in self._pending.get(news_id, ())
+                if comment.author_id == author_id
+            ]
+
+    def __len__(self):
+        return len(self._items)
+
+    def save(self, batch):
+        """
+        Сохраняет пачку одним запросом.
+
+        Если пачка не сохраняется целиком, например новость уже
+        удалена, комментарии сохраняются по одному и теряются только
+        ошибочные.
+        """
+        try:
+            Comment.objects.bulk_create(batch)
+        except DatabaseError:
+            for comment in batch:
+                try:
+                    Comment.objects.bulk_create([comment])
+                except DatabaseError:
+                    logger.exception(
+                        'Комментарий к новости %s не сохранён.',
+                        comment.news_id
+                    )
+
+    def flush(self):
+        """Сохраняет одну пачку из начала очереди, возвращает её размер."""
+        with self._flush_lock, pin_primary():
+            with self._lock:
+                batch = [
+                    self._items[index]
+                    for index in range(min(self.batch_size, len(self._items)))
+                ]
+            if not batch:
+                return 0
+            self.save(batch)
+            news_ids = list(dict.fromkeys(
+                comment.news_id for comment in batch
+            ))
+            with self._lock:
+                for comment in batch:
+                    self._items.popleft()
+                    pending = self._pending[comment.news_id]
+                    pending.pop(0)
+                    if not pending:
+                        del self._pending[comment.news_id]
+            comments_flushed.send(sender=self.__class__, news_ids=news_ids)
+            return len(batch)
+
+    def drain(self):
+        """Сохраняет всю очередь."""
+        while self.flush():
+            pass
+
+    def start(self):
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is not None:
+                return
+            self._worker = threading.Thread(
+                target=self.run, name='comment-queue', daemon=True
+            )
+            self._worker.start()
+        atexit.register(self.drain)
+
+    def run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.drain()
+            except Exception:
+                logger.exception('Ошибка записи очереди комментариев.')
+            finally:
+                close_old_connections()
+
+
+comment_queue = CommentQueue()
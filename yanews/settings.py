@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -6,7 +7,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = 'django-insecure-7)dgs++2!#==aye4rd=5)c)bw0eokiyqx0hts6#t80!$c&$s+('
 
-DEBUG = True
+DEBUG = os.getenv('DJANGO_DEBUG', 'True') == 'True'
 
 ALLOWED_HOSTS = ['localhost', '127.0.0.1']
 
@@ -22,41 +23,150 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'news.middleware.PrimaryPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'news.middleware.CachedUserMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Метрики запросов: заголовок Server-Timing и страница для Prometheus.
+NEWS_METRICS_ENABLED = os.getenv('NEWS_METRICS_ENABLED', 'False') == 'True'
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+if NEWS_METRICS_ENABLED:
+    MIDDLEWARE.insert(0, 'news.middleware.RequestMetricsMiddleware')
+
 ROOT_URLCONF = 'yanews.urls'
 
+# Профиль шаблонов: в production скомпилированные шаблоны хранятся
+# в памяти процесса и не перечитываются с диска на каждый запрос.
+NEWS_TEMPLATE_PROFILE = os.getenv(
+    'NEWS_TEMPLATE_PROFILE', 'development' if DEBUG else 'production'
+)
+
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'news.context_processors.cache_timeouts',
             ],
+            'loaders': (
+                [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)]
+                if NEWS_TEMPLATE_PROFILE == 'production'
+                else TEMPLATE_LOADERS
+            ),
         },
     },
 ]
 
 WSGI_APPLICATION = 'yanews.wsgi.application'
 
+# Асинхронные представления главной и страницы новости для работы под ASGI.
+NEWS_ASYNC_VIEWS = os.getenv('NEWS_ASYNC_VIEWS', 'False') == 'True'
 
-DATABASES = {
-    'default': {
+
+# База данных выбирается переменной окружения NEWS_DATABASE.
+# Django 3.2 не держит пул соединений сам: постоянные соединения
+# задаются CONN_MAX_AGE, а пул — PgBouncer перед PostgreSQL.
+# С PgBouncer в режиме transaction нужно NEWS_DB_POOLER=pgbouncer:
+# курсоры на стороне сервера с ним не работают.
+NEWS_DATABASES = {
+    'sqlite': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+        # Сколько секунд ждать снятия блокировки записи.
+        'OPTIONS': {'timeout': int(os.getenv('SQLITE_TIMEOUT', 20))},
+    },
+    'postgresql': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.getenv('POSTGRES_DB', 'yanews'),
+        'USER': os.getenv('POSTGRES_USER', 'yanews'),
+        'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+        'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
+        'PORT': os.getenv('POSTGRES_PORT', '5432'),
+        'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', 60)),
+        'DISABLE_SERVER_SIDE_CURSORS': (
+            os.getenv('NEWS_DB_POOLER') == 'pgbouncer'
+        ),
+    },
+}
+
+NEWS_DATABASE = os.getenv('NEWS_DATABASE', 'sqlite')
+
+DATABASES = {
+    'default': NEWS_DATABASES[NEWS_DATABASE],
+}
+
+# Реплики только для чтения: пути к копиям файла SQLite
+# или адреса серверов PostgreSQL через запятую.
+NEWS_REPLICA_LOCATIONS = [
+    location for location in os.getenv('NEWS_REPLICAS', '').split(',')
+    if location
+]
+NEWS_REPLICAS = []
+for number, location in enumerate(NEWS_REPLICA_LOCATIONS, start=1):
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME' if NEWS_DATABASE == 'sqlite' else 'HOST': location,
+        # В тестах реплика — та же тестовая база, что и основная.
+        'TEST': {'MIRROR': 'default'},
     }
+    NEWS_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['news.routers.PrimaryReplicaRouter']
+
+# После записи пользователь столько секунд читает из основной базы.
+NEWS_PRIMARY_PIN_COOKIE = 'news_primary'
+NEWS_PRIMARY_PIN_SECONDS = 5
+
+# Режим SQLite для одного сервера: журнал WAL, при котором чтение
+# не ждёт записи, и synchronous=NORMAL вместо fsync на каждую транзакцию.
+NEWS_SQLITE_TUNING = os.getenv('NEWS_SQLITE_TUNING', 'True') == 'True'
+
+# Бэкенд кеша выбирается переменной окружения NEWS_CACHE_BACKEND.
+NEWS_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+    },
+}
+
+CACHES = {
+    'default': NEWS_CACHE_BACKENDS[os.getenv('NEWS_CACHE_BACKEND', 'locmem')],
+}
+
+# Хранилище сессий. cached_db читает сессию из кеша и пишет сквозь него
+# в базу; signed_cookies хранит сессию в подписанной cookie и не
+# обращается к базе совсем, но сессию нельзя завершить на сервере.
+NEWS_SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
 }
+SESSION_ENGINE = NEWS_SESSION_ENGINES[
+    os.getenv('NEWS_SESSION_ENGINE', 'cached_db')
+]
+# Сколько секунд пользователь хранится в кеше, см. CachedUserMiddleware.
+# С кешем locmem это и есть время, за которое смена пароля или блокировка
+# пользователя доходит до остальных процессов.
+USER_CACHE_TIMEOUT = 60
 
 
 AUTH_PASSWORD_VALIDATORS = []
@@ -80,3 +190,72 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_COUNT_ON_PAGE = 50
+
+# Частота записи комментариев: запросов за период в секундах.
+COMMENT_RATE_LIMITS = {
+    'user': (10, 60),
+    'ip': (30, 60),
+}
+# Кеш счётчиков ограничителя частоты. Общий лимит для всех процессов
+# сервера даёт только общий кеш с атомарным incr (Memcached, Redis):
+# с locmem лимит действует в каждом процессе отдельно, см. news.ratelimit.
+COMMENT_RATE_LIMIT_CACHE = 'default'
+# Число процессов сервера: чем их больше, тем меньше пачки токенов
+# ограничителя частоты с общим кешем.
+NEWS_WEB_PROCESSES = int(os.getenv('NEWS_WEB_PROCESSES', 1))
+COMMENT_RATE_LIMIT_PROCESSES = NEWS_WEB_PROCESSES
+
+NEWS_API_PAGE_SIZE = 20
+
+# Поиск: число результатов и длина фрагмента текста в словах.
+SEARCH_RESULTS_COUNT = 20
+SEARCH_SNIPPET_WORDS = 30
+# Сколько самых новых совпадений ранжируется по релевантности.
+SEARCH_CANDIDATES = 2000
+
+# Архив: новостей на странице месяца или дня.
+NEWS_ARCHIVE_PAGE_SIZE = 50
+# Адресов в одном разделе карты сайта (не больше 50 000 по протоколу).
+SITEMAP_SECTION_SIZE = 50_000
+
+# Модерация комментариев, см. news.moderation. Пока она выключена,
+# комментарии публикуются сразу после быстрых проверок в форме.
+COMMENT_MODERATION = os.getenv('COMMENT_MODERATION', 'False') == 'True'
+COMMENT_INLINE_CHECKS = ('news.moderation.check_bad_words',)
+COMMENT_MODERATION_CHECKS = (
+    'news.moderation.check_links',
+    'news.moderation.check_repeated_text',
+)
+COMMENT_MODERATION_LIMITS = {
+    'links': 2,
+    'repeated_min_words': 12,
+    'unique_shingles_ratio': 0.5,
+    # Рассылка: один текст от flood_authors авторов за flood_window секунд.
+    'flood_min_words': 5,
+    'flood_authors': 3,
+    'flood_window': 600,
+}
+COMMENT_MODERATION_BATCH_SIZE = 500
+
+# Размер пачки комментариев на странице всей ветки (news:thread).
+COMMENTS_STREAM_CHUNK_SIZE = 500
+
+# Отложенная запись комментариев пачками, см. news.write_behind.
+# Очередь живёт в памяти процесса: режим рассчитан на один процесс
+# сервера (NEWS_WEB_PROCESSES=1), иначе следующий запрос автора может
+# попасть в процесс, который его комментария ещё не знает.
+COMMENT_WRITE_BEHIND = os.getenv('COMMENT_WRITE_BEHIND', 'False') == 'True'
+COMMENT_QUEUE_BATCH_SIZE = 100
+# Сверх этого числа комментариев в очереди они сохраняются сразу.
+COMMENT_QUEUE_MAX_SIZE = 10000
+# Как часто фоновый поток сохраняет неполную пачку, секунды.
+COMMENT_QUEUE_INTERVAL = 0.2
+
+NEWS_CACHE_TIMEOUT = 60 * 5
+# Сколько секунд шапка страницы хранится в кеше фрагментов.
+HEADER_CACHE_TIMEOUT = 60 * 10
+
+# Файл со списком запрещённых в комментариях слов.
+BAD_WORDS_FILE = BASE_DIR / 'news' / 'bad_words.txt'